@@ -3,7 +3,8 @@ from sqlalchemy.orm import Session
 from ..db.session import get_db
 from ..schemas import stats as schemas_stats
 from ..crud import crud_stats
-from ..dependencies import get_current_user, require_role
+from ..dependencies import get_current_user, require_role, require_manager
+from ..services import llm_cache
 from ..models.user import User
 
 router = APIRouter()
@@ -19,3 +20,11 @@ def read_overall_stats(
     """
     stats = crud_stats.get_overall_stats(db)
     return stats
+
+
+@router.get("/ai-cache", response_model=schemas_stats.LLMCacheStats)
+def read_llm_cache_stats(current_user: User = Depends(require_manager)):
+    """
+    Hit/miss counters of the Gemini response cache.
+    """
+    return llm_cache.stats()
@@ -1,26 +1,27 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from datetime import date, timedelta
 from pathlib import Path
-import os
-import shutil
-from uuid import uuid4
-import logging
 import json
+import logging
 
 from .. import schemas, models, crud
-from ..services import ai
-from ..db.session import get_db
+from ..core.config import settings
+from ..services import ai, analysis, provenance, storage
+from ..db.session import SessionLocal, get_db
 from ..dependencies import require_student
-from ..models import ThesisDefense, Report, Student
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
-UPLOAD_DIR = Path("storage/reports")
+UPLOAD_DIR = Path(settings.REPORTS_DIR)
 UPLOAD_DIR.mkdir(exist_ok=True, parents=True)
 
 MAX_UPLOAD_BYTES = 10 * 1024 * 1024  # 10MB
+MULTIPART_OVERHEAD_BYTES = 64 * 1024  # Form fields and multipart boundaries
 ALLOWED_PDF_CONTENT_TYPES = {"application/pdf", "application/x-pdf", "application/acrobat", "applications/vnd.pdf"}
 
 def _sanitize_filename(filename: str) -> str:
@@ -36,6 +37,7 @@ def _sanitize_filename(filename: str) -> str:
 @router.post("/soutenance-requests", response_model=schemas.ThesisDefense)
 async def create_soutenance_request(
     *,
+    request: Request,
     db: Session = Depends(get_db),
     title: str = Form(...),
     domain: str = Form(...),
@@ -45,6 +47,7 @@ async def create_soutenance_request(
     """
     Create a new soutenance request (thesis defense).
     Uploads PDF report, creates report entry, and creates thesis defense entry.
+    AI analysis is queued and can be followed via the analysis status endpoint.
     """
     student_id = current_user.id
     # Validate PDF file
@@ -53,13 +56,18 @@ async def create_soutenance_request(
     if pdf.content_type and pdf.content_type not in ALLOWED_PDF_CONTENT_TYPES:
         raise HTTPException(status_code=400, detail="Invalid PDF content type")
 
-    file_extension = os.path.splitext(pdf.filename)[1]
-    new_filename = f"report_student_{student_id}_{title.replace(' ', '_')}_{uuid4().hex[:6]}{file_extension}"
-    file_location = os.path.join(UPLOAD_DIR, new_filename)
+    # Reject oversized bodies before touching the upload at all
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES:
+        raise HTTPException(status_code=413, detail="File exceeds the 10MB upload limit")
 
+    # Reports are stored by content hash, so re-submitting a PDF reuses its blob
     try:
-        with open(file_location, "wb+") as file_object:
-            shutil.copyfileobj(pdf.file, file_object)
+        blob = await storage.store_upload(pdf, max_bytes=MAX_UPLOAD_BYTES)
+    except storage.UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except storage.InvalidPDFError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
     finally:
@@ -68,65 +76,19 @@ async def create_soutenance_request(
         except Exception:
             pass
 
-    # AI (Gemini) with safe fallbacks - pass actual PDF path for text extraction
-    logger = logging.getLogger(__name__)
-    
-    abs_path = Path(file_location).resolve()
-    rel_path = new_filename
-    
-    logger.info(f"\n{'='*70}")
-    logger.info(f"AI PROCESSING START - Title: {title}")
-    logger.info(f"PDF Path: {abs_path}")
-    logger.info(f"Student Claimed Domain: {domain}")
-    logger.info(f"{'='*70}")
-    
-    # Extract and log PDF content
-    pdf_text = ai.extract_pdf_text(str(abs_path))
-    logger.info(f"Extracted PDF Text: {len(pdf_text)} characters")
-    logger.info(f"Preview: {pdf_text[:200]}...")
-    
-    # Generate summary
-    logger.info("\nGenerating AI Summary...")
-    ai_summary = ai.summarize(title, pdf_path=str(abs_path))
-    logger.info(f"AI Summary: {ai_summary}")
-    
-    # Get domain confidence scores
-    logger.info("\nClassifying Domain...")
-    domain_confidence = ai.classify_domain(title, domain, pdf_path=str(abs_path))
-    logger.info(f"Domain Confidence: {domain_confidence}")
-    # Store as JSON string for database
-    ai_domain = json.dumps(domain_confidence)
-    
-    # Calculate similarity with previous reports
-    logger.info("\nCalculating Similarity...")
-    prior_defenses = crud.thesis_defense.get_by_student(db=db, student_id=student_id)
-    prior_reports = []
-    for defense in prior_defenses:
-        if defense.report:
-            prior_reports.append({
-                'id': defense.id,
-                'title': defense.title,
-                'content': defense.report.ai_summary or defense.title
-            })
-    
-    similarity_result = ai.similarity_score(title, prior_reports, pdf_path=str(abs_path))
-    logger.info(f"Similarity Result: {similarity_result}")
-    # Store similarity as float (max similarity score)
-    ai_similarity_score = similarity_result['max_similarity'] if similarity_result else 0.0
-    
-    logger.info(f"\n{'='*70}")
-    logger.info("AI PROCESSING COMPLETE")
-    logger.info(f"{'='*70}\n")
-    
-    # Create Report entry with the saved relative path
+    # AI analysis runs in the background worker (app/worker.py); the report
+    # starts in the "analyzing" state and is filled in once the job completes.
+    # An identical PDF that was already analyzed gets its results copied instead.
+    # The report, the defense and the job are committed together: a request is
+    # never left without its analysis job.
+    duplicate = crud.report.get_analyzed_by_hash(db, blob.content_hash) if blob.already_existed else None
     report_data = schemas.ReportCreate(
-        file_name=rel_path,
-        ai_summary=ai_summary,
-        ai_domain=ai_domain,
-        ai_similarity_score=ai_similarity_score,
+        file_name=blob.file_name,
+        content_hash=blob.content_hash,
+        analysis_status=analysis.ANALYZING,
         student_id=student_id
     )
-    new_report = crud.report.create(db=db, obj_in=report_data)
+    new_report = crud.report.create(db=db, obj_in=report_data, commit=False)
     
     # Create ThesisDefense entry
     defense_data = schemas.ThesisDefenseCreate(
@@ -135,14 +97,27 @@ async def create_soutenance_request(
         report_id=new_report.id,
         status="pending"
     )
-    new_thesis_defense = crud.thesis_defense.create(db=db, obj_in=defense_data)
-    
+    new_thesis_defense = crud.thesis_defense.create(db=db, obj_in=defense_data, commit=False)
+
     # Update student's domain if provided
     student = db.query(models.Student).filter(models.Student.user_id == student_id).first()
     if student and domain:
         student.major = domain
+
+    if duplicate is not None:
+        # Commits the pending rows along with the copied results
+        source_runs = crud.report_ai_run.get_latest_by_stage(db, duplicate.id)
+        analysis.apply_result(db, new_report, analysis.reused_result(new_report, duplicate, source_runs))
+    else:
+        crud.analysis_job.enqueue(
+            db,
+            report_id=new_report.id,
+            claimed_domain=domain,
+            max_attempts=settings.ANALYSIS_MAX_ATTEMPTS,
+            commit=False
+        )
         db.commit()
-    
+
     db.refresh(new_thesis_defense)
     return new_thesis_defense
 
@@ -208,3 +183,121 @@ def get_single_request(
         raise HTTPException(status_code=403, detail="Not authorized to view this request")
     
     return defense
+
+
+@router.get("/soutenance-requests/{defense_id}/analysis", response_model=schemas.ReportAnalysisStatus)
+def get_request_analysis_status(
+    *,
+    db: Session = Depends(get_db),
+    defense_id: int,
+    current_user: models.user.User = Depends(require_student)
+):
+    """
+    Get the progress of the AI analysis of a soutenance request's report.
+    Polled by the student UI until the status is "completed" or "failed".
+    """
+    defense = crud.thesis_defense.get(db=db, id=defense_id)
+    if not defense:
+        raise HTTPException(status_code=404, detail="Request not found")
+    if defense.student_id != current_user.id and current_user.role in ['student']:
+        raise HTTPException(status_code=403, detail="Not authorized to view this request")
+
+    report = defense.report
+    if report is None:
+        raise HTTPException(status_code=404, detail="No report attached to this request")
+
+    job = crud.analysis_job.get_latest_for_report(db, report_id=report.id)
+    return schemas.ReportAnalysisStatus(
+        defense_id=defense.id,
+        report_id=report.id,
+        status=report.analysis_status or analysis.COMPLETED,
+        attempts=job.attempts if job else 0,
+        last_error=job.last_error if job else None,
+        report=report,
+    )
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _save_summary(report_id: int, summary: str, run: provenance.StageRun) -> bool:
+    """Store a streamed summary and its provenance row in one transaction,
+    unless the analysis worker has taken the report meanwhile."""
+    # The request's session is closed once streaming starts; use a fresh one
+    db = SessionLocal()
+    try:
+        # The row lock keeps the worker from writing between the check and the update
+        report = db.query(models.Report).filter(models.Report.id == report_id).with_for_update().first()
+        if report is None or report.analysis_status == analysis.ANALYZING:
+            db.rollback()
+            return False
+        report.ai_summary = summary
+        db.add(models.ReportAiRun(**run.mapping(report_id)))
+        db.commit()
+        return True
+    finally:
+        db.close()
+
+
+@router.get("/soutenance-requests/{defense_id}/summary/stream")
+async def stream_request_summary(
+    *,
+    db: Session = Depends(get_db),
+    defense_id: int,
+    refresh: bool = False,
+    current_user: models.user.User = Depends(require_student)
+):
+    """
+    Stream the report summary as Server-Sent Events while Gemini writes it.
+    Events: "token" (a chunk of text), then "done" with the full summary, or "error".
+    A summary that already exists is sent as a single token unless refresh=true.
+    Only a summary written by Gemini is stored in the report's ai_summary
+    ("done" says whether it was); local and placeholder fallbacks are only shown,
+    so an outage cannot overwrite a good summary. While the report is being
+    analyzed a new summary cannot be requested (409).
+    """
+    defense = crud.thesis_defense.get(db=db, id=defense_id)
+    if not defense:
+        raise HTTPException(status_code=404, detail="Request not found")
+    if defense.student_id != current_user.id and current_user.role in ['student']:
+        raise HTTPException(status_code=403, detail="Not authorized to view this request")
+    report = defense.report
+    if report is None:
+        raise HTTPException(status_code=404, detail="No report attached to this request")
+
+    report_id, title, existing = report.id, defense.title, report.ai_summary
+    generate = refresh or not existing
+    if generate and report.analysis_status == analysis.ANALYZING:
+        raise HTTPException(status_code=409, detail="The report is being analyzed; its summary will be ready when the analysis ends")
+    pdf_path = str(analysis.report_path(report))
+
+    async def events():
+        if not generate:
+            yield _sse("token", existing)
+            yield _sse("done", {"summary": existing, "saved": True})
+            return
+        parts = []
+        try:
+            with provenance.recording(), provenance.stage(provenance.SUMMARY) as run:
+                async for chunk in ai.summarize_stream(title, pdf_path=pdf_path):
+                    parts.append(chunk)
+                    yield _sse("token", chunk)
+        except Exception as e:
+            logger.warning(f"Summary stream for report #{report_id} failed: {e!r}")
+            yield _sse("error", {"detail": "Summary generation was interrupted"})
+            return
+        summary = "".join(parts).strip()
+        saved = False
+        if run.method == "gemini":
+            saved = await run_in_threadpool(_save_summary, report_id, summary, run)
+        else:
+            logger.info(f"Summary stream for report #{report_id} fell back to {run.method}; not stored")
+        yield _sse("done", {"summary": summary, "saved": saved})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Disable proxy buffering so tokens reach the browser as they arrive
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
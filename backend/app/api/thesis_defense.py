@@ -6,8 +6,8 @@ from pydantic import BaseModel
 from .. import schemas, models
 from .. import crud
 from ..db.session import get_db
-from ..services import jury_ai
-from ..dependencies import get_current_user, require_manager
+from ..services import jury_ai, jury_index, related
+from ..dependencies import get_current_user, require_manager, require_professor
 
 router = APIRouter()
 
@@ -17,6 +17,36 @@ class JurySuggestion(BaseModel):
     name: str
     reason: str
 
+# Response model for related theses
+class RelatedThesis(BaseModel):
+    report_id: int
+    defense_id: int | None = None
+    title: str
+    score: float
+    ai_summary: str | None = None
+
+
+def _related_theses(db: Session, matches) -> List[RelatedThesis]:
+    report_ids = [report_id for report_id, _ in matches]
+    defenses = {
+        d.report_id: d
+        for d in db.query(models.ThesisDefense).filter(models.ThesisDefense.report_id.in_(report_ids)).all()
+    } if report_ids else {}
+    reports = {
+        r.id: r for r in db.query(models.Report).filter(models.Report.id.in_(report_ids)).all()
+    } if report_ids else {}
+    return [
+        RelatedThesis(
+            report_id=report_id,
+            defense_id=defenses[report_id].id if report_id in defenses else None,
+            title=defenses[report_id].title if report_id in defenses else reports[report_id].file_name,
+            score=round(score, 4),
+            ai_summary=reports[report_id].ai_summary,
+        )
+        for report_id, score in matches
+        if report_id in reports
+    ]
+
 @router.get("/", response_model=List[schemas.ThesisDefense])
 def read_thesis_defenses(
     db: Session = Depends(get_db),
@@ -146,27 +176,16 @@ def get_jury_suggestions(
     if not defense:
         raise HTTPException(status_code=404, detail="Thesis defense not found")
     
-    # Get available professors
-    professors = crud.professor.get_multi(db=db)
-    available_profs = [
-        {
-            "id": p.user_id,
-            "name": f"{p.user.first_name} {p.user.last_name}" if p.user else f"Professor {p.user_id}",
-            "specialty": p.specialty or "General"
-        }
-        for p in professors
-    ]
+    # Get available professors from the specialty index (reloaded only when professors changed)
+    jury_index.index.refresh(db)
+    available_profs = jury_index.index.professors
     
     # Get thesis domain from report
     thesis_domain = "General"
     thesis_title = defense.title or "Untitled Thesis"
     
     if defense.report and defense.report.ai_domain:
-        try:
-            import json
-            thesis_domain = json.loads(defense.report.ai_domain)
-        except:
-            thesis_domain = defense.report.ai_domain
+        thesis_domain = defense.report.ai_domain
     
     # Get AI suggestions
     suggestions = jury_ai.suggest_jury_members(
@@ -177,3 +196,40 @@ def get_jury_suggestions(
     )
     
     return suggestions
+
+
+
+@router.get("/related-search", response_model=List[RelatedThesis])
+def search_related_theses(
+    *,
+    db: Session = Depends(get_db),
+    q: str,
+    k: int = 5,
+    current_user: models.user.User = Depends(require_professor)
+):
+    """
+    Find earlier theses matching a free-text topic (TF-IDF cosine similarity, offline).
+    """
+    related.index.refresh(db)
+    return _related_theses(db, related.index.search(q, k=min(k, 50)))
+
+
+@router.get("/{defense_id}/related", response_model=List[RelatedThesis])
+def get_related_theses(
+    *,
+    db: Session = Depends(get_db),
+    defense_id: int,
+    k: int = 5,
+    current_user: models.user.User = Depends(require_professor)
+):
+    """
+    Get the k earlier theses closest in topic to this defense's report (TF-IDF cosine similarity, offline).
+    """
+    defense = crud.thesis_defense.get(db=db, id=defense_id)
+    if not defense:
+        raise HTTPException(status_code=404, detail="Thesis defense not found")
+    if not defense.report_id:
+        raise HTTPException(status_code=404, detail="No report attached to this defense")
+
+    related.index.refresh(db)
+    return _related_theses(db, related.index.similar_to_report(defense.report_id, k=min(k, 50)))
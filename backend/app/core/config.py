@@ -8,6 +8,68 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     CORS_ORIGINS: str = "http://localhost:3000,http://localhost:3001" # Default for development
 
+    # Report storage and background analysis
+    REPORTS_DIR: str = "storage/reports"
+    TEXTS_DIR: str = "storage/texts" # Extracted PDF text, keyed by content hash
+    PDF_EXTRACT_WORKERS: int = 2
+    PDF_EXTRACT_TIMEOUT_SECONDS: float = 60.0
+    PDF_MAX_PAGES: int = 300
+    OCR_ENABLED: bool = True # Used only when extraction finds no text and Tesseract is installed
+    OCR_MIN_TEXT_CHARS: int = 200 # Less extracted text than this triggers OCR
+    OCR_WORKERS: int = 2
+    OCR_MAX_PAGES: int = 30
+    OCR_DPI: int = 200
+    OCR_LANG: str = "eng+fra"
+    OCR_TIMEOUT_SECONDS: float = 300.0
+    TESSERACT_CMD: str = "tesseract"
+
+    # Gemini
+    GEMINI_TIMEOUT_SECONDS: float = 20.0 # Per generate_content call
+    GEMINI_REQUESTS_PER_MINUTE: float = 10.0 # Client-side token bucket, per model
+    GEMINI_BURST: float = 5.0
+    GEMINI_MAX_QUEUE_SECONDS: float = 30.0 # Longest wait for a rate limiter token
+    GEMINI_BREAKER_FAILURES: int = 5 # Consecutive failures before the circuit opens
+    GEMINI_BREAKER_RESET_SECONDS: float = 60.0
+    GEMINI_HEDGE_ENABLED: bool = True # Race slow primary calls against the lite model
+    GEMINI_HEDGE_PERCENTILE: float = 0.9 # Primary latency percentile after which the hedge is sent
+    GEMINI_HEDGE_MIN_SAMPLES: int = 20 # No hedging until the model has this many latency samples
+    GEMINI_HEDGE_MIN_DELAY_SECONDS: float = 0.5
+    AI_BACKEND: str = "gemini" # "fake": local stand-in (services/fake_genai.py) for offline benchmarks
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_READ: bool = True # False: ignore cached answers but keep storing new ones
+    LLM_CACHE_PATH: str = "storage/cache/llm_cache.sqlite3"
+    LLM_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    LLM_CACHE_MAX_ENTRIES: int = 5000
+    ANALYSIS_MAX_ATTEMPTS: int = 3
+    ANALYSIS_RETRY_DELAY_SECONDS: int = 30 # Multiplied by the attempt number
+    ANALYSIS_POLL_INTERVAL_SECONDS: float = 2.0
+    ANALYSIS_STALE_JOB_SECONDS: int = 900 # Running jobs without a heartbeat for this long are requeued
+    ANALYSIS_HEARTBEAT_SECONDS: int = 60
+
+    # Fake AI backend (AI_BACKEND=fake)
+    FAKE_AI_SEED: int = 0
+    FAKE_AI_LATENCY_MEDIAN_SECONDS: float = 1.5
+    FAKE_AI_LATENCY_SIGMA: float = 0.5 # Log-normal spread
+    FAKE_AI_LITE_LATENCY_FACTOR: float = 0.5 # Lite models answer this much faster
+    FAKE_AI_RATE_LIMIT_RATE: float = 0.0 # Share of calls failing with a 429
+    FAKE_AI_TIMEOUT_RATE: float = 0.0 # Share of calls hanging past the request timeout
+    FAKE_AI_STREAM_CHUNK_SECONDS: float = 0.1
+    FAKE_AI_RESPONSES_PATH: str = "" # JSON list of {"match": regex, "response": text}
+
+    # Summaries
+    SUMMARY_ENGINE: str = "gemini" # "gemini" (TextRank as fallback) or "textrank" (Gemini as fallback)
+    SUMMARY_SENTENCES: int = 3
+    SUMMARY_CHUNKED: bool = False # Map-reduce Gemini summary over the whole text instead of its beginning
+    SUMMARY_CHUNK_TOKENS: int = 3000
+    SUMMARY_MAX_CHUNKS: int = 8 # Longer texts are sampled evenly across the document
+    SUMMARY_CHUNK_CONCURRENCY: int = 4
+
+    # Offline models
+    DOMAIN_MODEL_PATH: str = "storage/models/domain_nb.npz" # Built by scripts/train_domain_model.py
+    DOMAIN_MODEL_MIN_CONFIDENCE: float = 0.8 # Above this the local classifier answers without Gemini
+    DOMAIN_MODEL_MIN_KNOWN_TERMS: int = 50 # ...provided the text has this many terms it saw in training
+    JURY_INDEX_MAX_AGE_SECONDS: float = 300.0 # Professor specialty index reload, for changes made by other processes
+
     class Config:
         pass
 
@@ -3,3 +3,5 @@ from .crud_professor import professor
 from .crud_jury_member import jury_member
 from . import crud_report as report
 from . import crud_user
+from . import crud_analysis_job as analysis_job
+from . import crud_report_ai_run as report_ai_run
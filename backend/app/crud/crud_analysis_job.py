@@ -0,0 +1,134 @@
+from datetime import timedelta
+from typing import Optional, Tuple
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from ..models.analysis_job import AnalysisJob
+from ..models.report import Report
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+def enqueue(
+    db: Session, *, report_id: int, claimed_domain: str | None = None, max_attempts: int = 3, commit: bool = True
+) -> AnalysisJob:
+    """Queue a report for background analysis; with commit=False the job is only flushed"""
+    db_obj = AnalysisJob(
+        report_id=report_id,
+        claimed_domain=claimed_domain,
+        status=QUEUED,
+        attempts=0,
+        max_attempts=max_attempts,
+    )
+    db.add(db_obj)
+    if not commit:
+        db.flush()
+        return db_obj
+    db.commit()
+    db.refresh(db_obj)
+    return db_obj
+
+
+def claim_next(db: Session, *, worker_id: str) -> Optional[AnalysisJob]:
+    """Lock the oldest runnable job for this worker, skipping rows other workers hold"""
+    job = (
+        db.query(AnalysisJob)
+        .filter(AnalysisJob.status == QUEUED, AnalysisJob.run_after <= func.now())
+        .order_by(AnalysisJob.run_after, AnalysisJob.id)
+        .with_for_update(skip_locked=True)
+        .first()
+    )
+    if job is None:
+        db.rollback()
+        return None
+    job.status = RUNNING
+    job.attempts += 1
+    job.locked_by = worker_id
+    job.locked_at = func.now()
+    job.heartbeat_at = func.now()
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def complete(db: Session, job: AnalysisJob) -> AnalysisJob:
+    """Mark a job as successfully processed"""
+    job.status = DONE
+    job.last_error = None
+    job.locked_by = None
+    job.finished_at = func.now()
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def fail(db: Session, job: AnalysisJob, *, error: str, retry_delay_seconds: int) -> bool:
+    """Record a failed attempt. Returns True if the job was rescheduled for a retry."""
+    retrying = job.attempts < job.max_attempts
+    job.last_error = error[:2000]
+    job.locked_by = None
+    if retrying:
+        job.status = QUEUED
+        job.run_after = func.now() + timedelta(seconds=retry_delay_seconds * job.attempts)
+    else:
+        job.status = FAILED
+        job.finished_at = func.now()
+    db.commit()
+    db.refresh(job)
+    return retrying
+
+
+def heartbeat(db: Session, job_id: int, *, worker_id: str) -> bool:
+    """Renew a running job's lease. Returns False if the worker no longer holds the job."""
+    count = (
+        db.query(AnalysisJob)
+        .filter(AnalysisJob.id == job_id, AnalysisJob.status == RUNNING, AnalysisJob.locked_by == worker_id)
+        .update({AnalysisJob.heartbeat_at: func.now()}, synchronize_session=False)
+    )
+    db.commit()
+    return count > 0
+
+
+def requeue_stale(db: Session, *, older_than_seconds: int) -> Tuple[int, int]:
+    """Take back jobs left running by a worker that died mid-analysis.
+
+    A job with attempts left goes back to the queue; one that used them all
+    is failed together with its report. Returns (requeued, failed) counts.
+    """
+    stale = (
+        db.query(AnalysisJob)
+        .filter(
+            AnalysisJob.status == RUNNING,
+            func.coalesce(AnalysisJob.heartbeat_at, AnalysisJob.locked_at) < func.now() - timedelta(seconds=older_than_seconds),
+        )
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    requeued = failed = 0
+    for job in stale:
+        job.locked_by = None
+        if job.attempts < job.max_attempts:
+            job.status = QUEUED
+            requeued += 1
+        else:
+            job.status = FAILED
+            job.last_error = "Worker stopped responding during the last attempt"
+            job.finished_at = func.now()
+            db.query(Report).filter(Report.id == job.report_id).update(
+                {Report.analysis_status: "failed"}, synchronize_session=False
+            )
+            failed += 1
+    db.commit()
+    return requeued, failed
+
+
+def get_latest_for_report(db: Session, report_id: int) -> Optional[AnalysisJob]:
+    """Get the most recent analysis job of a report"""
+    return (
+        db.query(AnalysisJob)
+        .filter(AnalysisJob.report_id == report_id)
+        .order_by(AnalysisJob.id.desc())
+        .first()
+    )
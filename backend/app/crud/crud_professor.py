@@ -1,4 +1,4 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from typing import List, Any
 from ..models.user import User, UserRole
 from ..models.professor import Professor
@@ -10,7 +10,18 @@ class CRUDProfessor:
         return db.query(Professor).filter(Professor.user_id == id).first()
 
     def get_multi(self, db: Session, *, skip: int = 0, limit: int = 100) -> List[Professor]:
-        return db.query(Professor).offset(skip).limit(limit).all()
+        return (
+            db.query(Professor)
+            .options(joinedload(Professor.user))
+            .order_by(Professor.user_id)
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+
+    def get_all_with_user(self, db: Session) -> List[Professor]:
+        """Every professor with its user loaded in the same query."""
+        return db.query(Professor).options(joinedload(Professor.user)).order_by(Professor.user_id).all()
 
     def create_with_user(self, db: Session, *, obj_in: ProfessorCreateData) -> User:
         """
@@ -1,6 +1,9 @@
-from typing import Optional
+from typing import Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import Float, func, true, tuple_
 from sqlalchemy.orm import Session
 from ..models.report import Report
+from ..models.report_lsh_bucket import ReportLshBucket
+from ..models.report_ai_run import ReportAiRun
 from ..schemas.report import ReportCreate, ReportUpdate
 
 
@@ -19,16 +22,48 @@ def get_by_student(db: Session, student_id: int, skip: int = 0, limit: int = 100
     return db.query(Report).filter(Report.student_id == student_id).offset(skip).limit(limit).all()
 
 
-def create(db: Session, obj_in: ReportCreate) -> Report:
-    """Create a new report"""
+def count_by_domain(db: Session, min_confidence: float = 0.0) -> List[Tuple[str, int, float]]:
+    """Count reports per domain above ``min_confidence``, with their average confidence"""
+    entries = func.jsonb_each_text(Report.ai_domain).table_valued("key", "value").lateral()
+    confidence = entries.c.value.cast(Float)
+    rows = (
+        db.query(entries.c.key, func.count(Report.id), func.avg(confidence))
+        .select_from(Report)
+        .join(entries, true())
+        .filter(confidence > min_confidence)
+        .group_by(entries.c.key)
+        .order_by(func.count(Report.id).desc())
+        .all()
+    )
+    return [(domain, count, round(float(average), 2)) for domain, count, average in rows]
+
+
+def get_analyzed_by_hash(db: Session, content_hash: str, exclude_id: Optional[int] = None) -> Optional[Report]:
+    """Get an already analyzed report with the same PDF content"""
+    query = db.query(Report).filter(
+        Report.content_hash == content_hash,
+        Report.analysis_status == "completed",
+    )
+    if exclude_id is not None:
+        query = query.filter(Report.id != exclude_id)
+    return query.order_by(Report.id.desc()).first()
+
+
+def create(db: Session, obj_in: ReportCreate, commit: bool = True) -> Report:
+    """Create a new report; with commit=False it is only flushed, for the caller to commit"""
     db_obj = Report(
         file_name=obj_in.file_name,
+        content_hash=obj_in.content_hash,
         ai_summary=obj_in.ai_summary,
         ai_domain=obj_in.ai_domain,
         ai_similarity_score=obj_in.ai_similarity_score,
+        analysis_status=obj_in.analysis_status,
         student_id=obj_in.student_id
     )
     db.add(db_obj)
+    if not commit:
+        db.flush()
+        return db_obj
     db.commit()
     db.refresh(db_obj)
     return db_obj
@@ -51,3 +86,50 @@ def delete(db: Session, id: int) -> Report:
     db.delete(obj)
     db.commit()
     return obj
+
+
+def get_lsh_candidates(
+    db: Session, buckets: Sequence[Tuple[int, int]], exclude_id: Optional[int] = None, limit: int = 20
+) -> List[Report]:
+    """Get reports sharing at least one LSH bucket, most shared buckets first"""
+    matches = (
+        db.query(ReportLshBucket.report_id, func.count().label("shared"))
+        .filter(tuple_(ReportLshBucket.band, ReportLshBucket.bucket).in_(list(buckets)))
+        .group_by(ReportLshBucket.report_id)
+    )
+    if exclude_id is not None:
+        matches = matches.filter(ReportLshBucket.report_id != exclude_id)
+    matches = matches.subquery()
+    return (
+        db.query(Report)
+        .join(matches, matches.c.report_id == Report.id)
+        .order_by(matches.c.shared.desc(), Report.id.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+def bulk_update_analysis(
+    db: Session,
+    updates: Sequence[dict],
+    buckets: Dict[int, Sequence[Tuple[int, int]]],
+    runs: Sequence[dict] = (),
+) -> None:
+    """Write analysis results of many reports in one transaction.
+
+    ``updates`` are column mappings that include ``id``; ``buckets`` replaces
+    the LSH buckets of the reports it lists; ``runs`` are ``report_ai_runs``
+    rows to add.
+    """
+    if updates:
+        db.bulk_update_mappings(Report, list(updates))
+    if buckets:
+        db.query(ReportLshBucket).filter(ReportLshBucket.report_id.in_(list(buckets))).delete(synchronize_session=False)
+        db.bulk_insert_mappings(ReportLshBucket, [
+            {"report_id": report_id, "band": band, "bucket": bucket}
+            for report_id, pairs in buckets.items()
+            for band, bucket in pairs
+        ])
+    if runs:
+        db.bulk_insert_mappings(ReportAiRun, list(runs))
+    db.commit()
@@ -0,0 +1,64 @@
+from typing import Dict, Mapping, Sequence
+from sqlalchemy import and_, func, not_, or_, select
+from sqlalchemy.orm import Session
+from ..models.report import Report
+from ..models.report_ai_run import ReportAiRun
+
+
+def _latest_ids():
+    """Id of the latest run of each (report, stage)"""
+    return select(func.max(ReportAiRun.id)).group_by(ReportAiRun.report_id, ReportAiRun.stage)
+
+
+def get_latest_by_stage(db: Session, report_id: int) -> Dict[str, ReportAiRun]:
+    """Get the run behind each AI field currently stored on a report"""
+    runs = (
+        db.query(ReportAiRun)
+        .filter(ReportAiRun.report_id == report_id, ReportAiRun.id.in_(_latest_ids()))
+        .all()
+    )
+    return {run.stage: run for run in runs}
+
+
+def fallback_report_ids():
+    """Select ids of reports where at least one stage currently holds a fallback result"""
+    return (
+        select(ReportAiRun.report_id)
+        .where(ReportAiRun.id.in_(_latest_ids()), ReportAiRun.fallback.is_(True))
+        .distinct()
+    )
+
+
+def report_ids_by_method(stage: str, method: str):
+    """Select ids of reports whose current ``stage`` result was produced by ``method``, not as a fallback"""
+    return select(ReportAiRun.report_id).where(
+        ReportAiRun.id.in_(_latest_ids()),
+        ReportAiRun.stage == stage,
+        ReportAiRun.method == method,
+        ReportAiRun.fallback.is_(False),
+    )
+
+
+def stale_report_ids(prompt_versions: Mapping[str, Sequence[str]], models: Sequence[str]):
+    """Select ids of reports analyzed with an outdated prompt or model, or before provenance was recorded.
+
+    ``prompt_versions`` lists the current prompt versions of each stage; only
+    Gemini results (and copies of them) are compared, local methods have no prompt.
+    """
+    outdated = or_(
+        ReportAiRun.model.not_in(list(models)),
+        *[
+            and_(ReportAiRun.stage == stage, ReportAiRun.prompt_version.not_in(list(versions)))
+            for stage, versions in prompt_versions.items()
+        ],
+    )
+    stale_runs = select(ReportAiRun.report_id).where(
+        ReportAiRun.id.in_(_latest_ids()),
+        ReportAiRun.method.in_(("gemini", "reused")),
+        outdated,
+    )
+    unrecorded = select(Report.id).where(
+        Report.analysis_status.isnot(None),
+        not_(select(ReportAiRun.id).where(ReportAiRun.report_id == Report.id).exists()),
+    )
+    return stale_runs.union(unrecorded)
@@ -2,6 +2,10 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func, extract
 from collections import defaultdict
 from ..models import ThesisDefense, Student, Professor
+from . import crud_report
+
+DOMAIN_STATS_MIN_CONFIDENCE = 0.3 # A report counts for every domain it is at least this likely to belong to
+
 
 def get_overall_stats(db: Session):
     # Total counts
@@ -26,11 +30,18 @@ def get_overall_stats(db: Session):
     
     monthly_thesis_defenses = [{"month": month, "count": count} for month, count in monthly_defenses_query]
 
+    # Reports per AI domain, aggregated over the JSONB confidences
+    reports_by_domain = [
+        {"domain": domain, "count": count, "average_confidence": average}
+        for domain, count, average in crud_report.count_by_domain(db, min_confidence=DOMAIN_STATS_MIN_CONFIDENCE)
+    ]
+
     return {
         "total_thesis_defenses": total_thesis_defenses,
         "total_students": total_students,
         "total_professors": total_professors,
         "thesis_defenses_by_status": thesis_defenses_by_status,
         "monthly_thesis_defenses": monthly_thesis_defenses,
+        "reports_by_domain": reports_by_domain,
     }
 
@@ -39,8 +39,8 @@ class CRUDThesisDefense:
             .all()
         )
 
-    def create(self, db: Session, *, obj_in: schemas.ThesisDefenseCreate) -> models.ThesisDefense:
-        """Create a new thesis defense"""
+    def create(self, db: Session, *, obj_in: schemas.ThesisDefenseCreate, commit: bool = True) -> models.ThesisDefense:
+        """Create a new thesis defense; with commit=False it is only flushed, for the caller to commit"""
         db_obj = self.model(
             title=obj_in.title,
             description=obj_in.description,
@@ -49,6 +49,9 @@ class CRUDThesisDefense:
             report_id=obj_in.report_id
         )
         db.add(db_obj)
+        if not commit:
+            db.flush()
+            return db_obj
         db.commit()
         db.refresh(db_obj)
         return db_obj
@@ -8,3 +8,6 @@ from .report_access import ReportAccess, ReportAction
 from .thesis_defense import ThesisDefense
 from .jury_member import JuryMember, JuryRole
 from .professor_evaluation import ProfessorEvaluation
+from .analysis_job import AnalysisJob
+from .report_lsh_bucket import ReportLshBucket
+from .report_ai_run import ReportAiRun
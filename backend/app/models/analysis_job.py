@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from ..db.session import Base
+
+class AnalysisJob(Base):
+    """Durable queue entry for the AI analysis of an uploaded report.
+
+    Rows are claimed by ``app.worker`` with ``SELECT ... FOR UPDATE SKIP LOCKED``
+    so several workers can drain the queue concurrently. A running job whose
+    ``heartbeat_at`` stops advancing belonged to a worker that died.
+    """
+    __tablename__ = "analysis_jobs"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    report_id = Column(Integer, ForeignKey("reports.id", ondelete="CASCADE", onupdate="CASCADE"), nullable=False, index=True)
+    claimed_domain = Column(String(150), nullable=True) # Domain declared by the student on upload
+    status = Column(String(30), nullable=False, default="queued", index=True) # queued | running | done | failed
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    last_error = Column(Text, nullable=True)
+    run_after = Column(DateTime, nullable=False, server_default=func.now())
+    locked_by = Column(String(120), nullable=True)
+    locked_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True) # Renewed by the worker while the job runs
+    created_at = Column(DateTime, server_default=func.now())
+    finished_at = Column(DateTime, nullable=True)
+
+    report = relationship("Report")
+
+    def __repr__(self):
+        return f"<AnalysisJob(id={self.id}, report_id={self.report_id}, status='{self.status}')>"
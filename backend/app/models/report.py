@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Float, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float, ForeignKey, Index, LargeBinary
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..db.session import Base
@@ -8,14 +9,25 @@ class Report(Base):
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True) # "ID_Rapport"
     file_name = Column(String(255), nullable=False) # "Nom_Fichier"
+    content_hash = Column(String(64), nullable=True, index=True) # SHA-256 of the PDF, see services/storage.py
     ai_summary = Column(Text, nullable=True) # "Resume_IA"
-    ai_domain = Column(String(150), nullable=True) # "Domaine_IA"
+    ai_domain = Column(JSONB, nullable=True) # "Domaine_IA": confidence per domain, {"AI": 0.7, "Web": 0.2, ...}
     ai_similarity_score = Column(Float, nullable=True) # "Score_Similarite_IA"
+    ai_similar_report_id = Column(Integer, ForeignKey("reports.id", ondelete="SET NULL", onupdate="CASCADE"), nullable=True) # Closest report found by MinHash/LSH
+    minhash = Column(LargeBinary, nullable=True) # MinHash signature, see services/minhash.py
     student_id = Column(Integer, ForeignKey("students.user_id", ondelete="SET NULL", onupdate="CASCADE"), nullable=True) # "D_Utilisateur" -> fk_rapport_etudiant
     submission_date = Column(DateTime, server_default=func.now()) # "Date_depot"
+    analysis_status = Column(String(30), nullable=True) # analyzing | completed | failed
+    # Statement time rather than transaction start: an analysis can hold its transaction for minutes
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.clock_timestamp(), index=True)
 
     # Relationship back to Student
     student = relationship("Student", back_populates="reports")
 
+    __table_args__ = (
+        # Serves key lookups (ai_domain ? 'AI') and containment (ai_domain @> '{"AI": 1.0}')
+        Index("ix_reports_ai_domain", "ai_domain", postgresql_using="gin"),
+    )
+
     def __repr__(self):
         return f"<Report(id={self.id}, file_name='{self.file_name}')>"
@@ -0,0 +1,32 @@
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Index, Integer, String
+from sqlalchemy.sql import func
+from ..db.session import Base
+
+class ReportAiRun(Base):
+    """How one stage of a report's AI analysis was produced (see services/provenance.py).
+
+    Every analysis appends one row per stage; the latest row of a stage
+    describes the value currently stored on the report.
+    """
+    __tablename__ = "report_ai_runs"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    report_id = Column(Integer, ForeignKey("reports.id", ondelete="CASCADE", onupdate="CASCADE"), nullable=False)
+    stage = Column(String(30), nullable=False) # summary | domain | similarity
+    method = Column(String(30), nullable=False) # gemini | textrank | local_model | jaccard | minhash | placeholder | reused | none
+    fallback = Column(Boolean, nullable=False, default=False) # The primary engine gave no answer
+    model = Column(String(80), nullable=True) # Gemini model that answered, if any
+    prompt_version = Column(String(16), nullable=True) # Hash of the prompt template, see provenance.prompt_version
+    latency_ms = Column(Integer, nullable=False, default=0)
+    prompt_tokens = Column(Integer, nullable=False, default=0)
+    response_tokens = Column(Integer, nullable=False, default=0)
+    calls = Column(Integer, nullable=False, default=0) # Gemini requests sent, hedges included
+    cached_calls = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_report_ai_runs_report_stage", "report_id", "stage", "id"),
+    )
+
+    def __repr__(self):
+        return f"<ReportAiRun(id={self.id}, report_id={self.report_id}, stage='{self.stage}', method='{self.method}')>"
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, SmallInteger, BigInteger, ForeignKey, Index
+from ..db.session import Base
+
+class ReportLshBucket(Base):
+    """LSH band bucket of a report's MinHash signature (see services/minhash.py)."""
+    __tablename__ = "report_lsh_buckets"
+
+    report_id = Column(Integer, ForeignKey("reports.id", ondelete="CASCADE", onupdate="CASCADE"), primary_key=True)
+    band = Column(SmallInteger, primary_key=True)
+    bucket = Column(BigInteger, nullable=False)
+
+    __table_args__ = (
+        Index("ix_report_lsh_buckets_band_bucket", "band", "bucket"),
+    )
+
+    def __repr__(self):
+        return f"<ReportLshBucket(report_id={self.report_id}, band={self.band})>"
@@ -1,7 +1,7 @@
 from .user import User, UserCreate
 from .student import Student, StudentCreate
 from .student import StudentDashboardStats
-from .report import Report, ReportCreate, ReportUpdate
+from .report import Report, ReportCreate, ReportUpdate, ReportAnalysisStatus
 from .thesis_defense import ThesisDefense, ThesisDefenseCreate, ThesisDefenseUpdate
 from .professor import Professor, ProfessorCreate
 from .jury_member import JuryMember, JuryMemberCreate, JuryMemberUpdate
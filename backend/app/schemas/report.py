@@ -1,23 +1,28 @@
 from pydantic import BaseModel
 from datetime import datetime
+from typing import Dict
 
 # Shared properties
 class ReportBase(BaseModel):
     file_name: str
     ai_summary: str | None = None
-    ai_domain: str | None = None
+    ai_domain: Dict[str, float] | None = None # Confidence per domain
     ai_similarity_score: float | None = None
+    ai_similar_report_id: int | None = None
+    analysis_status: str | None = None
 
 # Properties to receive via API on creation
 class ReportCreate(ReportBase):
     student_id: int
+    content_hash: str | None = None
 
 # Properties to receive via API on update
 class ReportUpdate(BaseModel):
     file_name: str | None = None
     ai_summary: str | None = None
-    ai_domain: str | None = None
+    ai_domain: Dict[str, float] | None = None
     ai_similarity_score: float | None = None
+    analysis_status: str | None = None
 
 # Properties to return to client
 class Report(ReportBase):
@@ -27,3 +32,12 @@ class Report(ReportBase):
 
     class Config:
         from_attributes = True
+
+# Progress of the background AI analysis, polled by the student UI
+class ReportAnalysisStatus(BaseModel):
+    defense_id: int
+    report_id: int | None = None
+    status: str
+    attempts: int = 0
+    last_error: str | None = None
+    report: Report | None = None
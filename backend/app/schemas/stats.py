@@ -5,9 +5,24 @@ class MonthlyCount(BaseModel):
     month: str # Format: YYYY-MM
     count: int
 
+class DomainCount(BaseModel):
+    domain: str
+    count: int
+    average_confidence: float
+
 class OverallStats(BaseModel):
     total_thesis_defenses: int
     total_students: int
     total_professors: int
     thesis_defenses_by_status: Dict[str, int]
     monthly_thesis_defenses: List[MonthlyCount]
+    reports_by_domain: List[DomainCount] = []
+
+
+class LLMCacheStats(BaseModel):
+    entries: int
+    hits: int
+    misses: int
+    hit_rate: float
+    evictions: int
+    saved_seconds: float # Gemini latency avoided by cache hits
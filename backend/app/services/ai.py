@@ -1,172 +1,298 @@
 """Lightweight Gemini integration with safe fallbacks.
 
 - Uses GEMINI_API_KEY if provided; otherwise returns heuristic defaults.
+- Calls go through the shared ``ai_client`` (rate limiting, circuit breaker,
+  response cache).
 - Designed for Khalid's student upload flow (summary, domain, similarity).
 - Does not handle authentication; caller must provide inputs.
+- Summaries come from Gemini or the local TextRank summarizer in
+  ``textrank``, whichever ``SUMMARY_ENGINE`` makes primary; the other is
+  the fallback.
+- Domain classification asks the offline classifier in ``domain_model``
+  first and only calls Gemini when it is not confident.
+- PDF text comes from the extracted-text store in ``pdf_text``, so a file is
+  parsed only once however many helpers read it, and goes through
+  ``text_clean`` before any prompt is built. Helpers share one cleaned,
+  budgeted prefix per document (``_document_text``).
+- Each helper reports how its answer was produced (method, prompt version,
+  fallback or not) to ``provenance``, for the ``report_ai_runs`` table.
 """
 
 from __future__ import annotations
 
-import os
+import asyncio
 import json
-from typing import List, Optional, Dict
+import logging
+from functools import lru_cache
+from typing import AsyncIterator, Callable, List, Optional, Dict
 from pathlib import Path
 
-try:
-    import google.generativeai as genai  # type: ignore
-except ImportError:  # pragma: no cover - optional dependency
-    genai = None  # type: ignore
+from . import ai_client, domain_model, provenance, text_clean, textrank
+from .pdf_pool import ExtractionTimeout
+from ..core.config import settings
+from .pdf_text import UNEXTRACTABLE, file_sha256, get_text
 
-try:
-    import pdfplumber
-except ImportError:
-    pdfplumber = None
+logger = logging.getLogger(__name__)
 
-try:
-    import PyPDF2
-except ImportError:
-    PyPDF2 = None
 
+PROMPT_TEXT_CHARS = textrank.MAX_TEXT_CHARS  # Longest cleaned prefix a prompt or TextRank reads
+RAW_CHARS_PER_CLEAN_CHAR = 2  # Cleaning drops the TOC, headers and footers: read more raw text than needed
+PAGE_MARGIN_CHARS = 4000  # About a page, so the budget does not end on a truncated page
 
-def _get_model(prefer_lite: bool = False) -> Optional[object]:
-    """Get Gemini model, trying Flash first then Flash-Lite on rate limits."""
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key or genai is None:
-        return None
-    try:
-        genai.configure(api_key=api_key)
-        model_name = "gemini-2.5-flash-lite" if prefer_lite else "gemini-2.5-flash"
-        return genai.GenerativeModel(model_name)
-    except Exception:
-        return None
 
+@lru_cache(maxsize=32)
+def _cleaned_text(pdf_path: str, content_hash: str, max_chars: int | None) -> str:
+    raw_chars = None if max_chars is None else max_chars * RAW_CHARS_PER_CLEAN_CHAR + PAGE_MARGIN_CHARS
+    text = get_text(pdf_path, max_chars=raw_chars)
+    if not text or text == UNEXTRACTABLE:
+        return ""
+    return text_clean.clean(text)
 
-def _generate_with_fallback(model, prompt: str) -> Optional[str]:
-    """Generate content with automatic fallback to Flash-Lite on rate limit."""
-    if not model:
-        return None
-    
-    try:
-        resp = model.generate_content(prompt)
-        text = getattr(resp, "text", None)
-        if text:
-            return text.strip()
-    except Exception as e:
-        error_str = str(e)
-        # Check if it's a rate limit error (429)
-        if "429" in error_str or "quota" in error_str.lower() or "rate" in error_str.lower():
-            # Try Flash-Lite model
-            try:
-                lite_model = _get_model(prefer_lite=True)
-                if lite_model and lite_model != model:
-                    resp = lite_model.generate_content(prompt)
-                    text = getattr(resp, "text", None)
-                    if text:
-                        return text.strip()
-            except Exception:
-                pass
-    
-    return None
 
+def _document_text(pdf_path: str | None, max_chars: int | None = PROMPT_TEXT_CHARS) -> str:
+    """Cleaned text of a PDF (see ``text_clean``), or "" when there is none.
 
-def extract_pdf_text(pdf_path: str) -> str:
-    """Extract text from PDF using multiple methods for best accuracy."""
-    text = ""
-    
-    # Try pdfplumber first (most accurate)
-    if pdfplumber:
-        try:
-            with pdfplumber.open(pdf_path) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-            if text.strip():
-                return text.strip()
-        except Exception:
-            pass
-    
-    # Fallback to PyPDF2
-    if PyPDF2:
-        try:
-            with open(pdf_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                for page in reader.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-            if text.strip():
-                return text.strip()
-        except Exception:
-            pass
-    
-    return text.strip() or "[Unable to extract text from PDF]"
+    Only a budgeted prefix is extracted and cleaned, once per document:
+    every prompt builder reads at most ``PROMPT_TEXT_CHARS`` and shares it.
+    ``max_chars=None`` cleans the whole text (map-reduce summaries).
+    """
+    if not pdf_path or not Path(pdf_path).exists():
+        return ""
+    budget = None if max_chars is None else max(max_chars, PROMPT_TEXT_CHARS)
+    try:
+        text = _cleaned_text(pdf_path, file_sha256(pdf_path), budget)
+    except ExtractionTimeout:
+        return ""
+    return text if max_chars is None else text[:max_chars]
 
 
-def summarize(title: str, pdf_path: str | None = None) -> str:
-    """Generate English summary from PDF content."""
-    import logging
-    logger = logging.getLogger(__name__)
-    
-    fallback = f"Auto-generated summary placeholder for '{title}'. AI module will replace this text."
-    model = _get_model()
-    if not model:
-        logger.warning(f"⚠️ GEMINI UNAVAILABLE - Using placeholder summary")
-        return fallback
-    
-    # Extract PDF content if path provided
-    content = ""
-    if pdf_path and Path(pdf_path).exists():
-        content = extract_pdf_text(pdf_path)
-        # Limit to first 8000 chars to avoid token limits
-        if len(content) > 8000:
-            content = content[:8000] + "..."
-    
-    if not content or content == "[Unable to extract text from PDF]":
+def _summary_prompt(title: str, pdf_path: str | None) -> str:
+    # Limit to first 8000 chars to avoid token limits
+    content = _document_text(pdf_path)
+    if len(content) >= 8000:
+        content = content[:8000] + "..."
+
+    if not content:
         content = f"Title: {title}"
-    
-    prompt = (
+
+    return (
         "You are an academic assistant. Write a concise 2-3 sentence summary of this thesis/research paper in English.\n"
         "Focus on the main research problem, methodology, and expected outcomes.\n\n"
         f"Content:\n{content}\n\n"
         "Provide only the summary, no additional commentary."
     )
-    
-    result = _generate_with_fallback(model, prompt)
+
+
+def _local_summary(pdf_path: str | None) -> str:
+    """TextRank summary of the extracted text, or "" when there is none."""
+    text = _document_text(pdf_path)
+    if not text:
+        return ""
+    summary = textrank.summarize(text, sentences=settings.SUMMARY_SENTENCES)
+    if summary:
+        logger.info(f"✅ TEXTRANK - Generated summary ({len(summary)} chars)")
+    return summary
+
+
+def _summary_fallback(title: str, pdf_path: str | None, local_tried: bool) -> str:
+    summary = "" if local_tried else _local_summary(pdf_path)
+    if summary:
+        provenance.set_method("textrank", fallback=True)
+        return summary
+    provenance.set_method("placeholder", fallback=True)
+    logger.warning(f"⚠️ Using placeholder summary")
+    return f"Auto-generated summary placeholder for '{title}'. AI module will replace this text."
+
+
+CHARS_PER_TOKEN = 4  # Rough average for English and French prose
+
+
+def _long_text(pdf_path: str | None) -> Optional[str]:
+    """Full extracted text when chunked mode is on and it spans more than one chunk."""
+    if not settings.SUMMARY_CHUNKED:
+        return None
+    text = _document_text(pdf_path, max_chars=None)
+    if len(text) <= settings.SUMMARY_CHUNK_TOKENS * CHARS_PER_TOKEN:
+        return None
+    return text
+
+
+def _chunk_text(text: str, chunk_chars: int) -> List[str]:
+    """Split on line boundaries into chunks of at most ``chunk_chars``."""
+    chunks: List[str] = []
+    current = ""
+    for line in text.splitlines(keepends=True):
+        while len(line) > chunk_chars:
+            head, line = line[:chunk_chars], line[chunk_chars:]
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(head)
+        if len(current) + len(line) > chunk_chars:
+            chunks.append(current)
+            current = ""
+        current += line
+    if current.strip():
+        chunks.append(current)
+    return chunks
+
+
+def _select_chunks(chunks: List[str], max_chunks: int) -> List[str]:
+    """At most ``max_chunks`` chunks, evenly spaced so coverage still spans the whole document."""
+    if len(chunks) <= max_chunks:
+        return chunks
+    if max_chunks <= 1:
+        return chunks[:1]
+    return [chunks[round(i * (len(chunks) - 1) / (max_chunks - 1))] for i in range(max_chunks)]
+
+
+def _chunk_prompt(title: str, index: int, count: int, chunk: str) -> str:
+    return (
+        f"You are an academic assistant reading part {index} of {count} of the thesis \"{title}\".\n"
+        "Summarize this part in 2-3 sentences in English: its research problem, methods and results, if any.\n\n"
+        f"Content:\n{chunk}\n\n"
+        "Provide only the summary, no additional commentary."
+    )
+
+
+def _reduce_prompt(title: str, partials: List[str]) -> str:
+    parts = "\n".join(f"{i}. {partial}" for i, partial in enumerate(partials, start=1))
+    return (
+        "You are an academic assistant. Below are summaries of consecutive parts of the thesis "
+        f"\"{title}\", in order.\n"
+        "Combine them into a concise 2-3 sentence summary of the whole thesis in English.\n"
+        "Focus on the main research problem, methodology, and expected outcomes.\n\n"
+        f"Part summaries:\n{parts}\n\n"
+        "Provide only the summary, no additional commentary."
+    )
+
+
+async def _map_reduce_summary(title: str, text: str, timeout: float | None = None) -> Optional[str]:
+    """Summarize chunks concurrently, then combine the partial summaries in one reduce call.
+
+    Each chunk call goes through the shared rate limiter; at most
+    ``SUMMARY_CHUNK_CONCURRENCY`` are in flight.
+    """
+    chunks = _select_chunks(
+        _chunk_text(text, settings.SUMMARY_CHUNK_TOKENS * CHARS_PER_TOKEN), settings.SUMMARY_MAX_CHUNKS
+    )
+    semaphore = asyncio.Semaphore(settings.SUMMARY_CHUNK_CONCURRENCY)
+
+    async def summarize_chunk(index: int, chunk: str) -> Optional[str]:
+        async with semaphore:
+            return await ai_client.generate_async(_chunk_prompt(title, index, len(chunks), chunk), timeout=timeout)
+
+    results = await asyncio.gather(*(summarize_chunk(i, chunk) for i, chunk in enumerate(chunks, start=1)))
+    partials = [r for r in results if r]
+    logger.info(f"Map-reduce summary: {len(partials)}/{len(chunks)} chunk summaries")
+    if not partials:
+        return None
+    return await ai_client.generate_async(_reduce_prompt(title, partials), timeout=timeout)
+
+
+def _summary_result(result: Optional[str], chunked: bool) -> Optional[str]:
     if result:
+        provenance.set_method(
+            "gemini",
+            prompt_version=provenance.prompt_version(_chunk_prompt, _reduce_prompt) if chunked
+            else provenance.prompt_version(_summary_prompt),
+        )
         logger.info(f"✅ GEMINI SUCCESS - Generated summary ({len(result)} chars)")
-        return result
     else:
-        logger.warning(f"⚠️ GEMINI FAILED - Using placeholder summary")
-        return fallback
+        logger.warning(f"⚠️ GEMINI FAILED - No summary")
+    return result
 
 
-def classify_domain(content: str, user_provided_domain: str, pdf_path: str | None = None) -> Dict[str, float]:
-    """Classify domain with confidence percentages to verify user input.
-    
-    Returns dict like: {'AI': 0.7, 'Mobile': 0.2, 'Security': 0.1}
+def summarize(title: str, pdf_path: str | None = None) -> str:
+    """Generate English summary from PDF content.
+
+    ``settings.SUMMARY_ENGINE`` picks the primary engine: "gemini" falls back
+    to the local TextRank summary, "textrank" only calls Gemini when the text
+    has too little prose to summarize. With ``SUMMARY_CHUNKED`` Gemini
+    summarizes the whole document map-reduce style instead of its first
+    8000 characters.
     """
-    import logging
-    logger = logging.getLogger(__name__)
-    
-    domains = ["Web", "AI", "IoT", "Mobile", "Security", "Data Science", "Other"]
-    # More realistic fallback: give claimed domain high confidence, but not 100%
-    fallback = {user_provided_domain: 0.85, "Other": 0.15}
-    
-    model = _get_model()
-    if not model:
-        logger.warning(f"⚠️ GEMINI UNAVAILABLE - Using fallback domain classification: {fallback}")
-        return fallback
-    
-    # Extract PDF content if available
-    full_content = content
-    if pdf_path and Path(pdf_path).exists():
-        pdf_text = extract_pdf_text(pdf_path)
-        if pdf_text and pdf_text != "[Unable to extract text from PDF]":
-            full_content = pdf_text[:5000]  # Limit for token efficiency
-    
-    prompt = (
-        f"Analyze this thesis content and classify it into these domains: {', '.join(domains)}.\n"
+    local_first = settings.SUMMARY_ENGINE == "textrank"
+    if local_first:
+        summary = _local_summary(pdf_path)
+        if summary:
+            provenance.set_method("textrank")
+            return summary
+    if not ai_client.is_available():
+        logger.warning(f"⚠️ GEMINI UNAVAILABLE - No summary")
+    else:
+        text = _long_text(pdf_path)
+        if text:
+            result = ai_client.run_sync(_map_reduce_summary(title, text))
+        else:
+            result = ai_client.generate(_summary_prompt(title, pdf_path))
+        if _summary_result(result, chunked=bool(text)):
+            return result
+    return _summary_fallback(title, pdf_path, local_tried=local_first)
+
+
+async def summarize_async(title: str, pdf_path: str | None = None, timeout: float | None = None) -> str:
+    """Async variant of ``summarize``; the call is abandoned after ``timeout`` seconds."""
+    local_first = settings.SUMMARY_ENGINE == "textrank"
+    if local_first:
+        summary = await asyncio.to_thread(_local_summary, pdf_path)
+        if summary:
+            provenance.set_method("textrank")
+            return summary
+    if not ai_client.is_available():
+        logger.warning(f"⚠️ GEMINI UNAVAILABLE - No summary")
+    else:
+        text = await asyncio.to_thread(_long_text, pdf_path)
+        if text:
+            result = await _map_reduce_summary(title, text, timeout=timeout)
+        else:
+            prompt = await asyncio.to_thread(_summary_prompt, title, pdf_path)
+            result = await ai_client.generate_async(prompt, timeout=timeout)
+        if _summary_result(result, chunked=bool(text)):
+            return result
+    return await asyncio.to_thread(_summary_fallback, title, pdf_path, local_first)
+
+
+async def summarize_stream(title: str, pdf_path: str | None = None) -> AsyncIterator[str]:
+    """Stream the summary as Gemini produces it.
+
+    The prompt is the single-call one of ``summarize``, so the final text
+    is cached for the analysis worker. Local and placeholder summaries
+    arrive as one chunk. Like ``summarize`` it marks the provenance
+    method, which tells the caller whether the text came from Gemini.
+    """
+    local_first = settings.SUMMARY_ENGINE == "textrank"
+    if local_first:
+        summary = await asyncio.to_thread(_local_summary, pdf_path)
+        if summary:
+            provenance.set_method("textrank")
+            yield summary
+            return
+    produced = False
+    if not ai_client.is_available():
+        logger.warning(f"⚠️ GEMINI UNAVAILABLE - No summary")
+    else:
+        prompt = await asyncio.to_thread(_summary_prompt, title, pdf_path)
+        async for chunk in ai_client.generate_stream(prompt):
+            produced = True
+            yield chunk
+        if produced:
+            provenance.set_method("gemini", prompt_version=provenance.prompt_version(_summary_prompt))
+    if not produced:
+        yield await asyncio.to_thread(_summary_fallback, title, pdf_path, local_first)
+
+
+DOMAINS = ["Web", "AI", "IoT", "Mobile", "Security", "Data Science", "Other"]
+
+
+def _domain_text(content: str, pdf_path: str | None) -> str:
+    # Limit for token efficiency
+    return _document_text(pdf_path)[:5000] or content
+
+
+def _domain_prompt(full_content: str, user_provided_domain: str) -> str:
+    return (
+        f"Analyze this thesis content and classify it into these domains: {', '.join(DOMAINS)}.\n"
         f"The student claims it belongs to: {user_provided_domain}\n\n"
         "Provide confidence percentages for the top 3 most relevant domains.\n"
         "Return ONLY a JSON object with domain names as keys and percentages (0-1) as values.\n"
@@ -174,30 +300,117 @@ def classify_domain(content: str, user_provided_domain: str, pdf_path: str | Non
         f"Content:\n{full_content}\n\n"
         "JSON response:"
     )
-    
-    text = _generate_with_fallback(model, prompt)
+
+
+def _domain_fallback(user_provided_domain: str) -> Dict[str, float]:
+    # More realistic fallback: give claimed domain high confidence, but not 100%
+    if user_provided_domain == "Other":
+        return {"Other": 1.0}
+    return {user_provided_domain: 0.85, "Other": 0.15}
+
+
+def _local_domain_text(title: str, full_content: str) -> str:
+    """What the offline classifier reads; ``scripts/train_domain_model.py`` trains on the same."""
+    return full_content if full_content == title else f"{title}\n{full_content}"
+
+
+def _local_domain(title: str, full_content: str) -> Optional[domain_model.Prediction]:
+    """Offline classifier prediction, or None when no model has been trained."""
+    return domain_model.predict(_local_domain_text(title, full_content))
+
+
+def _is_confident(local: Optional[domain_model.Prediction]) -> bool:
+    # The raw posterior: renormalising the top domains would inflate it
+    return (
+        local is not None
+        and local.known_terms >= settings.DOMAIN_MODEL_MIN_KNOWN_TERMS
+        and local.confidence >= settings.DOMAIN_MODEL_MIN_CONFIDENCE
+    )
+
+
+def _use_domain_fallback(local: Optional[domain_model.Prediction], user_provided_domain: str) -> Dict[str, float]:
+    """The offline prediction when there is one, else the student's claim."""
+    if local:
+        provenance.set_method("local_model", fallback=True)
+        return local.domains
+    provenance.set_method("placeholder", fallback=True)
+    return _domain_fallback(user_provided_domain)
+
+
+def _domain_scores(text: str) -> Optional[Dict[str, float]]:
+    """Normalized confidences of a Gemini domain answer, or None when it is not usable."""
+    try:
+        result = _parse_json(text)
+        total = sum(float(v) for v in result.values())
+    except Exception:
+        return None
+    if total <= 0:
+        return None
+    return {k: round(float(v) / total, 2) for k, v in result.items()}
+
+
+def _valid_domain(text: str) -> bool:
+    return _domain_scores(text) is not None
+
+
+def _domain_result(
+    text: Optional[str], local: Optional[domain_model.Prediction], user_provided_domain: str
+) -> Dict[str, float]:
+    scores = _domain_scores(text) if text else None
+    if scores is not None:
+        logger.info(f"✅ GEMINI SUCCESS - Domain classification: {scores}")
+        provenance.set_method("gemini", prompt_version=provenance.prompt_version(_domain_prompt))
+        return scores
     if text:
-        try:
-            # Extract JSON from response (handle markdown code blocks)
-            if "```" in text:
-                text = text.split("```")[1]
-                if text.startswith("json"):
-                    text = text[4:]
-            text = text.strip()
-            result = json.loads(text)
-            # Normalize and validate
-            total = sum(result.values())
-            if total > 0:
-                logger.info(f"✅ GEMINI SUCCESS - Domain classification: {result}")
-                return {k: round(v / total, 2) for k, v in result.items()}
-        except Exception as e:
-            logger.error(f"❌ GEMINI PARSE ERROR - Failed to parse domain result: {e}")
-            pass
-    
+        logger.error(f"❌ GEMINI PARSE ERROR - Unusable domain result: {text[:200]!r}")
+
+    fallback = _use_domain_fallback(local, user_provided_domain)
     logger.warning(f"⚠️ GEMINI FAILED - Using fallback domain classification: {fallback}")
     return fallback
 
 
+def classify_domain(content: str, user_provided_domain: str, pdf_path: str | None = None) -> Dict[str, float]:
+    """Classify domain with confidence percentages to verify user input.
+    
+    The offline classifier answers alone when it is confident; Gemini is
+    asked otherwise, with the classifier's prediction as fallback.
+
+    Returns dict like: {'AI': 0.7, 'Mobile': 0.2, 'Security': 0.1}
+    """
+    full_content = _domain_text(content, pdf_path)
+    local = _local_domain(content, full_content)
+    if _is_confident(local):
+        logger.info(f"✅ LOCAL MODEL - Domain classification: {local.domains}")
+        provenance.set_method("local_model")
+        return local.domains
+    if not ai_client.is_available():
+        fallback = _use_domain_fallback(local, user_provided_domain)
+        logger.warning(f"⚠️ GEMINI UNAVAILABLE - Using fallback domain classification: {fallback}")
+        return fallback
+    text = ai_client.generate(_domain_prompt(full_content, user_provided_domain), validate=_valid_domain)
+    return _domain_result(text, local, user_provided_domain)
+
+
+async def classify_domain_async(
+    content: str, user_provided_domain: str, pdf_path: str | None = None, timeout: float | None = None
+) -> Dict[str, float]:
+    """Async variant of ``classify_domain``; the call is abandoned after ``timeout`` seconds."""
+    full_content = await asyncio.to_thread(_domain_text, content, pdf_path)
+    local = _local_domain(content, full_content)
+    if _is_confident(local):
+        logger.info(f"✅ LOCAL MODEL - Domain classification: {local.domains}")
+        provenance.set_method("local_model")
+        return local.domains
+    if not ai_client.is_available():
+        fallback = _use_domain_fallback(local, user_provided_domain)
+        logger.warning(f"⚠️ GEMINI UNAVAILABLE - Using fallback domain classification: {fallback}")
+        return fallback
+    text = await ai_client.generate_async(
+        _domain_prompt(full_content, user_provided_domain), timeout=timeout, validate=_valid_domain
+    )
+    return _domain_result(text, local, user_provided_domain)
+
+
 def similarity_score(current_content: str, previous_reports: List[Dict], pdf_path: str | None = None) -> Optional[Dict[str, any]]:
     """Calculate similarity with previous reports using semantic analysis.
     
@@ -207,44 +420,36 @@ def similarity_score(current_content: str, previous_reports: List[Dict], pdf_pat
         return None
     
     # Extract current PDF text
-    current_text = current_content
-    if pdf_path and Path(pdf_path).exists():
-        current_text = extract_pdf_text(pdf_path)[:3000]
+    current_text = _document_text(pdf_path)[:3000] or current_content
     
     if not current_text or len(current_text) < 50:
         return None
     
-    model = _get_model()
-    if model:
+    if ai_client.is_available():
         # Use Gemini for semantic similarity
         try:
             max_sim = 0.0
             similar_to = None
             
-            for prev_report in previous_reports[:5]:  # Check last 5 reports
-                prev_content = prev_report.get('content', prev_report.get('title', ''))
-                if not prev_content or len(prev_content) < 50:
-                    continue
-                
-                prompt = (
-                    "Compare these two thesis abstracts and rate their similarity from 0.0 (completely different) to 1.0 (identical/plagiarized).\n"
-                    "Consider: topic overlap, methodology, research questions, and domain.\n\n"
-                    f"Current thesis:\n{current_text[:1000]}\n\n"
-                    f"Previous thesis:\n{prev_content[:1000]}\n\n"
-                    "Respond with ONLY a single number between 0.0 and 1.0:"
-                )
-                
-                text = _generate_with_fallback(model, prompt)
-                if text:
+            # All pairwise comparisons go out in a single prompt (one round trip)
+            candidates = [
+                r for r in previous_reports[:5]  # Check top 5 reports
+                if len(r.get('content', r.get('title', '')) or '') >= 50
+            ]
+            if candidates:
+                text = ai_client.generate(_similarity_prompt(current_text, candidates), validate=json_answer(dict))
+                scores = _parse_json(text) if text else {}
+                for number, prev_report in enumerate(candidates, start=1):
                     try:
-                        sim = float(text)
-                        if sim > max_sim:
-                            max_sim = sim
-                            similar_to = prev_report.get('id', 'Unknown')
-                    except ValueError:
+                        sim = float(scores.get(str(number), 0.0))
+                    except (TypeError, ValueError):
                         continue
+                    if sim > max_sim:
+                        max_sim = sim
+                        similar_to = prev_report.get('id', 'Unknown')
             
             if max_sim > 0:
+                provenance.set_method("gemini", prompt_version=provenance.prompt_version(_similarity_prompt))
                 return {
                     'max_similarity': round(max_sim, 2),
                     'similar_to': similar_to,
@@ -266,29 +471,83 @@ def similarity_score(current_content: str, previous_reports: List[Dict], pdf_pat
     similar_to = None
     
     for prev_report in previous_reports:
-        prev_content = prev_report.get('content', prev_report.get('title', ''))
-        prev_bigrams = get_bigrams(prev_content)
-        
-        if not prev_bigrams:
-            continue
-        
-        intersection = len(current_bigrams & prev_bigrams)
-        union = len(current_bigrams | prev_bigrams)
-        sim = intersection / union if union else 0.0
+        if 'similarity' in prev_report:
+            # Exact full-document similarity already computed by the MinHash index
+            sim = prev_report['similarity']
+        else:
+            prev_content = prev_report.get('content', prev_report.get('title', ''))
+            prev_bigrams = get_bigrams(prev_content)
+            
+            if not prev_bigrams:
+                continue
+            
+            intersection = len(current_bigrams & prev_bigrams)
+            union = len(current_bigrams | prev_bigrams)
+            sim = intersection / union if union else 0.0
         
         if sim > max_sim:
             max_sim = sim
             similar_to = prev_report.get('id', 'Unknown')
     
+    if max_sim <= 0:
+        return None
+    provenance.set_method("jaccard", fallback=True)
     return {
         'max_similarity': round(max_sim, 2),
         'similar_to': similar_to,
         'method': 'jaccard'
-    } if max_sim > 0 else None
+    }
+
+
+def prompt_versions() -> Dict[str, List[str]]:
+    """Current prompt versions of each stage (``provenance.prompt_version``)."""
+    return {
+        provenance.SUMMARY: [
+            provenance.prompt_version(_summary_prompt),
+            provenance.prompt_version(_chunk_prompt, _reduce_prompt),
+        ],
+        provenance.DOMAIN: [provenance.prompt_version(_domain_prompt)],
+        provenance.SIMILARITY: [provenance.prompt_version(_similarity_prompt)],
+    }
 
 
 # Helpers
 
+def _parse_json(text: str):
+    """Parse a JSON answer, tolerating markdown code fences around it."""
+    if "```" in text:
+        text = text.split("```")[1]
+        if text.startswith("json"):
+            text = text[4:]
+    return json.loads(text.strip())
+
+
+def json_answer(kind: type) -> Callable[[str], bool]:
+    """``ai_client`` validator: the answer parses as JSON of type ``kind`` (dict, list)."""
+    def validate(text: str) -> bool:
+        try:
+            return isinstance(_parse_json(text), kind)
+        except (ValueError, IndexError):
+            return False
+    return validate
+
+
+def _similarity_prompt(current_text: str, candidates: List[Dict]) -> str:
+    previous = "\n\n".join(
+        f"Previous thesis {number}:\n{text_clean.clean(r.get('content', r.get('title', '')) or '')[:1000]}"
+        for number, r in enumerate(candidates, start=1)
+    )
+    return (
+        "Compare the current thesis with each numbered previous thesis and rate each similarity from 0.0 (completely different) to 1.0 (identical/plagiarized).\n"
+        "Consider: topic overlap, methodology, research questions, and domain.\n\n"
+        f"Current thesis:\n{current_text[:1000]}\n\n"
+        f"{previous}\n\n"
+        "Return ONLY a JSON object mapping each previous thesis number to its score.\n"
+        "Example: {\"1\": 0.15, \"2\": 0.8}\n\n"
+        "JSON response:"
+    )
+
+
 def _heuristic_domain(text: str, fallback: str = "Other") -> str:
     keywords = {
         "ai": "AI",
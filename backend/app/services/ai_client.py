@@ -0,0 +1,615 @@
+"""Shared Gemini client used by ``ai`` and ``jury_ai``.
+
+- ``genai.configure`` runs once and model handles are cached per name.
+- A client-side token bucket per model keeps us under our request quota
+  instead of discovering it through 429s.
+- A circuit breaker opens after repeated failures. While it is open, calls
+  return None immediately and callers use their heuristic fallback instead
+  of waiting for every request to time out.
+- Rate limits are recognised from the API's exception types, not by
+  searching the message text for "429".
+- Hedging: per-model latency histograms give a percentile threshold; a
+  call still running past it is raced against the lite model and the
+  slower of the two is cancelled.
+- Responses go through ``llm_cache``, stored under the model that actually
+  answered (the lite model when the hedge or the fallback won); lookups
+  try the requested model, then the fallback. Callers that parse the answer pass
+  ``validate``: an answer it rejects is returned but never cached, so a
+  malformed JSON answer is not replayed for the cache's whole TTL.
+- Calls use ``generate_content_async``. The SDK binds its async client to
+  the first event loop that uses it, so everything runs on one long-lived
+  background loop: synchronous ``generate`` goes through ``run_sync``
+  instead of a fresh ``asyncio.run``.
+- ``AI_BACKEND=fake`` swaps the SDK's models for ``fake_genai.FakeModel``
+  so the whole client can be benchmarked offline.
+- ``generate_stream`` streams a response chunk by chunk. It runs on the same
+  background loop and relays chunks to the caller's loop (e.g. uvicorn's).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import contextlib
+import contextvars
+import logging
+import os
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Coroutine, Dict, Optional, Tuple, TypeVar
+
+try:
+    import google.generativeai as genai  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    genai = None  # type: ignore
+
+try:
+    from google.api_core import exceptions as google_exceptions  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    google_exceptions = None  # type: ignore
+
+from ..core.config import settings
+from . import fake_genai, llm_cache, provenance
+
+logger = logging.getLogger(__name__)
+
+PRIMARY_MODEL = "gemini-2.5-flash"
+LITE_MODEL = "gemini-2.5-flash-lite"
+JURY_MODEL = "gemini-2.0-flash-exp"
+
+if google_exceptions is not None:
+    RATE_LIMIT_ERRORS: tuple = (google_exceptions.ResourceExhausted, google_exceptions.TooManyRequests)
+else:
+    RATE_LIMIT_ERRORS = (fake_genai.RateLimited,)
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at ``rate`` tokens/second."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> float:
+        """Take a token if one is available. Returns 0, or the seconds until the next token."""
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self, max_wait: float) -> bool:
+        """Block until a token is available, giving up after ``max_wait`` seconds."""
+        deadline = time.monotonic() + max_wait
+        while True:
+            wait = self.try_acquire()
+            if wait == 0:
+                return True
+            if time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    async def acquire_async(self, max_wait: float) -> bool:
+        """``acquire`` that yields to the event loop while waiting."""
+        deadline = time.monotonic() + max_wait
+        while True:
+            wait = self.try_acquire()
+            if wait == 0:
+                return True
+            if time.monotonic() + wait > deadline:
+                return False
+            await asyncio.sleep(wait)
+
+
+class CircuitBreaker:
+    """Opens after ``threshold`` consecutive failures; lets one probe through after ``reset_seconds``.
+
+    Callers ``admit()`` a call, report its outcome with ``record_success`` /
+    ``record_failure`` and always ``release()`` it, so a probe that ends
+    without a verdict (no rate-limiter token, empty answer, cancellation)
+    does not keep the probe slot forever.
+    """
+
+    def __init__(self, threshold: int, reset_seconds: float):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe = 0  # Id of the probe in flight, 0 when none
+        self._probes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_seconds:
+                return "half_open"
+            return "open"
+
+    def admit(self) -> Optional[int]:
+        """Ticket for one call: 0 while closed, a probe id for the half-open trial call, None while open."""
+        with self._lock:
+            if self._opened_at is None:
+                return 0
+            if time.monotonic() - self._opened_at >= self.reset_seconds and not self._probe:
+                self._probes += 1
+                self._probe = self._probes
+                return self._probe
+            return None
+
+    def release(self, ticket: Optional[int]) -> None:
+        """End of an admitted call: frees the probe slot if the call was the probe still in flight."""
+        with self._lock:
+            if ticket and self._probe == ticket:
+                self._probe = 0
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probe = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probe = 0
+            if self._failures >= self.threshold:
+                if self._opened_at is None:
+                    logger.warning(f"Gemini circuit breaker opened after {self._failures} failures")
+                self._opened_at = time.monotonic()
+
+
+class LatencyHistogram:
+    """Latencies in log-spaced buckets (10ms to ~10min); percentiles read from cumulative counts."""
+
+    BOUNDS = [0.01 * 1.25 ** i for i in range(50)]
+
+    def __init__(self):
+        self._counts = [0] * (len(self.BOUNDS) + 1)
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._counts[bisect.bisect_left(self.BOUNDS, seconds)] += 1
+            self.count += 1
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the ``q`` quantile (0-1), or None without samples."""
+        with self._lock:
+            if not self.count:
+                return None
+            rank = q * self.count
+            seen = 0
+            for index, count in enumerate(self._counts):
+                seen += count
+                if seen >= rank and count:
+                    return self.BOUNDS[min(index, len(self.BOUNDS) - 1)]
+            return self.BOUNDS[-1]
+
+
+breaker = CircuitBreaker(settings.GEMINI_BREAKER_FAILURES, settings.GEMINI_BREAKER_RESET_SECONDS)
+
+_models: Dict[str, object] = {}
+_buckets: Dict[str, TokenBucket] = {}
+_latencies: Dict[str, LatencyHistogram] = {}
+_hedges = {"fired": 0, "won": 0}
+_configured = False
+_lock = threading.Lock()
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+T = TypeVar("T")
+Validator = Callable[[str], bool]  # Whether an answer is usable, and so may be cached
+
+
+def _fake() -> bool:
+    return settings.AI_BACKEND == "fake"
+
+
+def is_available() -> bool:
+    """Whether Gemini can be called at all (SDK installed and key configured, or the fake backend)."""
+    return _fake() or (genai is not None and bool(os.getenv("GEMINI_API_KEY")))
+
+
+def get_model(name: str = PRIMARY_MODEL) -> Optional[object]:
+    """Long-lived model handle, configuring the SDK on first use."""
+    global _configured
+    if not is_available():
+        return None
+    with _lock:
+        if name not in _models:
+            if _fake():
+                _models[name] = fake_genai.FakeModel(name)
+                return _models[name]
+            try:
+                if not _configured:
+                    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+                    _configured = True
+                _models[name] = genai.GenerativeModel(name)
+            except Exception as e:
+                logger.error(f"Failed to initialise Gemini model {name}: {e}")
+                return None
+        return _models[name]
+
+
+def _bucket(name: str) -> TokenBucket:
+    with _lock:
+        if name not in _buckets:
+            _buckets[name] = TokenBucket(
+                rate=settings.GEMINI_REQUESTS_PER_MINUTE / 60.0,
+                capacity=settings.GEMINI_BURST,
+            )
+        return _buckets[name]
+
+
+def latency(name: str) -> LatencyHistogram:
+    with _lock:
+        if name not in _latencies:
+            _latencies[name] = LatencyHistogram()
+        return _latencies[name]
+
+
+def hedge_delay(name: str) -> Optional[float]:
+    """How long to wait for ``name`` before hedging: its latency percentile, once it has enough samples."""
+    if not settings.GEMINI_HEDGE_ENABLED:
+        return None
+    histogram = latency(name)
+    if histogram.count < settings.GEMINI_HEDGE_MIN_SAMPLES:
+        return None
+    return max(histogram.percentile(settings.GEMINI_HEDGE_PERCENTILE), settings.GEMINI_HEDGE_MIN_DELAY_SECONDS)
+
+
+def latency_stats() -> Dict[str, Dict[str, float]]:
+    """Per-model latency percentiles of this process, plus hedging counters."""
+    with _lock:
+        histograms = dict(_latencies)
+        hedges = dict(_hedges)
+    stats: Dict[str, Dict[str, float]] = {
+        name: {
+            "count": h.count,
+            "p50": h.percentile(0.5),
+            "p90": h.percentile(0.9),
+            "p99": h.percentile(0.99),
+        }
+        for name, h in histograms.items()
+    }
+    stats["hedges"] = hedges
+    return stats
+
+
+def _accepted(text: str, validate: Optional[Validator]) -> bool:
+    return validate is None or validate(text)
+
+
+async def _cache_get(
+    prompt: str, model: str, fallback_model: Optional[str], validate: Optional[Validator]
+) -> Optional[str]:
+    """Cached answer to ``prompt`` from ``model``, else from ``fallback_model``."""
+    for name in (model, fallback_model) if fallback_model else (model,):
+        cached = await asyncio.to_thread(llm_cache.get, name, prompt)
+        # An entry the caller rejects was stored before it validated answers: ask again
+        if cached is not None and _accepted(cached, validate):
+            provenance.note_call(name, prompt, cached, cached=True)
+            return cached
+    return None
+
+
+def _request_options(timeout: float | None) -> Dict:
+    timeout = timeout or settings.GEMINI_TIMEOUT_SECONDS
+    return {"timeout": timeout} if timeout else {}
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="gemini-async", daemon=True).start()
+        return _loop
+
+
+async def _in_context(coro: Coroutine[Any, Any, T], context: contextvars.Context) -> T:
+    return await asyncio.get_running_loop().create_task(coro, context=context)
+
+
+def run_sync(coro: Coroutine[Any, Any, T]) -> T:
+    """Run a coroutine on the shared background event loop and wait for its result.
+
+    The coroutine sees the caller's context variables (e.g. the provenance record).
+    """
+    loop = _background_loop()
+    if threading.current_thread().name == "gemini-async":
+        coro.close()
+        raise RuntimeError("run_sync called from the Gemini event loop; await the coroutine instead")
+    return asyncio.run_coroutine_threadsafe(_in_context(coro, contextvars.copy_context()), loop).result()
+
+
+async def _call_async(name: str, prompt: str, timeout: float | None, max_wait: float | None = None) -> Optional[str]:
+    model = get_model(name)
+    if model is None:
+        return None
+    max_wait = settings.GEMINI_MAX_QUEUE_SECONDS if max_wait is None else max_wait
+    if not await _bucket(name).acquire_async(max_wait=max_wait):
+        logger.warning(f"Gemini rate limiter: no token for {name} within {max_wait}s")
+        return None
+    options = _request_options(timeout)
+    start = time.perf_counter()
+    try:
+        # The request timeout alone does not bound time spent in retries; wait_for is the hard deadline
+        resp = await asyncio.wait_for(
+            model.generate_content_async(prompt, request_options=options),
+            timeout=options.get("timeout"),
+        )
+    except (asyncio.TimeoutError, asyncio.CancelledError):
+        # Timed-out and hedged-away calls count too (as a lower bound):
+        # leaving them out would hide how slow the model gets
+        latency(name).observe(time.perf_counter() - start)
+        provenance.note_call(name, prompt, None, failed=True)
+        raise
+    except Exception:
+        provenance.note_call(name, prompt, None, failed=True)
+        raise
+    latency(name).observe(time.perf_counter() - start)
+    text = getattr(resp, "text", None)
+    text = text.strip() if text else None
+    provenance.note_call(name, prompt, text, usage=getattr(resp, "usage_metadata", None))
+    return text
+
+
+async def _hedged_call(
+    name: str, hedge_model: Optional[str], prompt: str, timeout: float | None
+) -> Tuple[Optional[str], str]:
+    """Call ``name``; if it is still running past its hedge delay, race it against ``hedge_model``.
+
+    The first non-empty answer wins and the other request is cancelled.
+    Returns the answer and the model that gave it.
+    """
+    tasks = {asyncio.ensure_future(_call_async(name, prompt, timeout))}
+    try:
+        delay = hedge_delay(name) if hedge_model else None
+        if delay is None:
+            return await next(iter(tasks)), name
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if done:
+            return done.pop().result(), name
+
+        logger.info(f"Gemini {name} slower than p{settings.GEMINI_HEDGE_PERCENTILE * 100:.0f} ({delay:.2f}s): hedging with {hedge_model}")
+        # The hedge only goes out if the lite model has a token right now
+        hedge = asyncio.ensure_future(_call_async(hedge_model, prompt, timeout, max_wait=0))
+        tasks.add(hedge)
+        with _lock:
+            _hedges["fired"] += 1
+        error: Optional[BaseException] = None
+        while tasks:
+            done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    error = error or task.exception()
+                elif task.result():
+                    if task is hedge:
+                        with _lock:
+                            _hedges["won"] += 1
+                        return task.result(), hedge_model
+                    return task.result(), name
+        if error is not None:
+            raise error
+        return None, name
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def _generate_admitted(
+    prompt: str, model: str, fallback_model: Optional[str], timeout: float | None, validate: Optional[Validator]
+) -> Optional[str]:
+    """Body of ``generate_async`` once the breaker admitted the call; records its verdict."""
+    start = time.perf_counter()
+    try:
+        text, answered_by = await _hedged_call(model, fallback_model, prompt, timeout)
+    except RATE_LIMIT_ERRORS as e:
+        logger.warning(f"Gemini {model} rate limited: {e}")
+        breaker.record_failure()
+        text = None
+        if fallback_model:
+            answered_by = fallback_model
+            try:
+                text = await _call_async(fallback_model, prompt, timeout)
+            except Exception as fallback_error:
+                logger.warning(f"Gemini {fallback_model} failed: {fallback_error!r}")
+                breaker.record_failure()
+                return None
+    except Exception as e:
+        logger.warning(f"Gemini {model} failed: {e!r}")
+        breaker.record_failure()
+        return None
+
+    if text:
+        breaker.record_success()
+        if _accepted(text, validate):
+            await asyncio.to_thread(llm_cache.put, answered_by, prompt, text, time.perf_counter() - start)
+    return text
+
+
+async def generate_async(
+    prompt: str,
+    *,
+    model: str = PRIMARY_MODEL,
+    fallback_model: Optional[str] = LITE_MODEL,
+    timeout: float | None = None,
+    validate: Optional[Validator] = None,
+) -> Optional[str]:
+    """Generate text, falling back to ``fallback_model`` when ``model`` is rate limited.
+
+    A call still running past ``model``'s hedge delay (see ``hedge_delay``)
+    is raced against ``fallback_model``. Returns None when Gemini is
+    unavailable, the breaker is open, the rate limiter has no token in time
+    or every attempt failed. ``timeout`` is a deadline for each attempt.
+    Only answers ``validate`` accepts are cached, or served from the cache.
+    """
+    cached = await _cache_get(prompt, model, fallback_model, validate)
+    if cached is not None:
+        return cached
+    ticket = breaker.admit() if is_available() else None
+    if ticket is None:
+        return None
+    try:
+        return await _generate_admitted(prompt, model, fallback_model, timeout, validate)
+    finally:
+        breaker.release(ticket)
+
+
+def generate(
+    prompt: str,
+    *,
+    model: str = PRIMARY_MODEL,
+    fallback_model: Optional[str] = LITE_MODEL,
+    timeout: float | None = None,
+    validate: Optional[Validator] = None,
+) -> Optional[str]:
+    """Blocking ``generate_async``, for synchronous callers."""
+    return run_sync(
+        generate_async(prompt, model=model, fallback_model=fallback_model, timeout=timeout, validate=validate)
+    )
+
+
+async def _open_stream(name: str, prompt: str, timeout: float | None):
+    model = get_model(name)
+    if model is None:
+        return None
+    if not await _bucket(name).acquire_async(max_wait=settings.GEMINI_MAX_QUEUE_SECONDS):
+        logger.warning(f"Gemini rate limiter: no token for {name} within {settings.GEMINI_MAX_QUEUE_SECONDS}s")
+        return None
+    options = _request_options(timeout)
+    return await asyncio.wait_for(
+        model.generate_content_async(prompt, stream=True, request_options=options),
+        timeout=options.get("timeout"),
+    )
+
+
+async def _stream_chunks(
+    prompt: str, model: str, fallback_model: Optional[str], timeout: float | None, validate: Optional[Validator]
+) -> AsyncIterator[str]:
+    """Chunks of one streamed generation. Runs on the background loop."""
+    cached = await _cache_get(prompt, model, fallback_model, validate)
+    if cached is not None:
+        yield cached
+        return
+    ticket = breaker.admit() if is_available() else None
+    if ticket is None:
+        return
+
+    try:
+        start = time.perf_counter()
+        answered_by = model
+        try:
+            response = await _open_stream(model, prompt, timeout)
+        except RATE_LIMIT_ERRORS as e:
+            logger.warning(f"Gemini {model} rate limited: {e}")
+            breaker.record_failure()
+            provenance.note_call(model, prompt, None, failed=True)
+            response = None
+            if fallback_model:
+                answered_by = fallback_model
+                try:
+                    response = await _open_stream(fallback_model, prompt, timeout)
+                except Exception as fallback_error:
+                    logger.warning(f"Gemini {fallback_model} failed: {fallback_error!r}")
+                    breaker.record_failure()
+                    provenance.note_call(fallback_model, prompt, None, failed=True)
+                    return
+        except Exception as e:
+            logger.warning(f"Gemini {model} failed: {e!r}")
+            breaker.record_failure()
+            provenance.note_call(model, prompt, None, failed=True)
+            return
+        if response is None:
+            return
+
+        parts = []
+        chunks = response.__aiter__()
+        deadline = _request_options(timeout).get("timeout")
+        try:
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), timeout=deadline)
+                except StopAsyncIteration:
+                    break
+                text = getattr(chunk, "text", None)
+                if text:
+                    if not parts:
+                        logger.info(f"Gemini {answered_by} first chunk after {time.perf_counter() - start:.2f}s")
+                    parts.append(text)
+                    yield text
+        except Exception as e:
+            logger.warning(f"Gemini {answered_by} stream interrupted: {e!r}")
+            breaker.record_failure()
+            provenance.note_call(answered_by, prompt, None, failed=True)
+            if parts:
+                # Part of the text is already out: the caller must not mistake it for the whole
+                raise
+            return
+
+        text = "".join(parts).strip()
+        provenance.note_call(answered_by, prompt, text, usage=getattr(response, "usage_metadata", None))
+        if text:
+            breaker.record_success()
+            if _accepted(text, validate):
+                await asyncio.to_thread(llm_cache.put, answered_by, prompt, text, time.perf_counter() - start)
+    finally:
+        # Also when the consumer closes the stream early or the stream is never opened
+        breaker.release(ticket)
+
+
+async def generate_stream(
+    prompt: str,
+    *,
+    model: str = PRIMARY_MODEL,
+    fallback_model: Optional[str] = LITE_MODEL,
+    timeout: float | None = None,
+    validate: Optional[Validator] = None,
+) -> AsyncIterator[str]:
+    """Stream a generation chunk by chunk, from any event loop.
+
+    Same cache, rate limiter, breaker and fallback as ``generate``; a cached
+    response arrives as a single chunk; ``validate`` sees the whole text. Yields nothing when no text could be
+    generated, and raises if the stream breaks after some text was sent.
+    ``timeout`` bounds the wait for the first and every later chunk.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    done = object()
+
+    async def pump() -> None:
+        try:
+            async with contextlib.aclosing(_stream_chunks(prompt, model, fallback_model, timeout, validate)) as chunks:
+                async for chunk in chunks:
+                    loop.call_soon_threadsafe(queue.put_nowait, chunk)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, done)
+
+    # The caller's context goes along so the generation is accounted to its provenance stage
+    future = asyncio.run_coroutine_threadsafe(_in_context(pump(), contextvars.copy_context()), _background_loop())
+    try:
+        while True:
+            chunk = await queue.get()
+            if chunk is done:
+                return
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk
+    finally:
+        # The consumer went away (e.g. the client disconnected): stop generating
+        future.cancel()
@@ -0,0 +1,202 @@
+"""Report analysis pipeline executed by the background worker.
+
+Takes a stored ``Report`` row, runs the Gemini helpers from ``ai`` on its PDF
+and writes ``ai_summary``/``ai_domain``/``ai_similarity_score`` back, along
+with the MinHash signature that indexes the report for later uploads and
+one ``report_ai_runs`` row per stage recording how each field was produced.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from sqlalchemy.orm import Session
+
+from . import ai, ai_client, minhash, pdf_pool, pdf_text, provenance, storage
+from ..models import Report, ThesisDefense
+from .. import crud
+
+logger = logging.getLogger(__name__)
+
+ANALYZING = "analyzing"
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+@dataclass
+class AnalysisResult:
+    ai_summary: str
+    ai_domain: dict[str, float]
+    ai_similarity_score: float
+    ai_similar_report_id: int | None = None
+    minhash: bytes | None = None
+    runs: list[provenance.StageRun] = field(default_factory=list)
+
+
+def report_path(report: Report) -> Path:
+    """Absolute path of the PDF backing a report."""
+    return storage.blob_path(report.file_name).resolve()
+
+
+async def _staged(name: str, coro):
+    # gather runs each coroutine in its own task, so each gets its own stage
+    with provenance.stage(name):
+        return await coro
+
+
+async def _summary_and_domain(title: str, domain: str, pdf_path: str | None):
+    """Summary and domain classification are independent: run both calls at once."""
+    return await asyncio.gather(
+        _staged(provenance.SUMMARY, ai.summarize_async(title, pdf_path=pdf_path)),
+        _staged(provenance.DOMAIN, ai.classify_domain_async(title, domain, pdf_path=pdf_path)),
+    )
+
+
+def run_analysis(db: Session, report: Report, claimed_domain: str | None = None) -> AnalysisResult:
+    """Compute the AI fields of a report, and their provenance, without persisting them."""
+    with provenance.recording() as runs:
+        result = _run_analysis(db, report, claimed_domain)
+    result.runs = list(runs.values())
+    return result
+
+
+def _run_analysis(db: Session, report: Report, claimed_domain: str | None) -> AnalysisResult:
+    defense = db.query(ThesisDefense).filter(ThesisDefense.report_id == report.id).first()
+    title = defense.title if defense else report.file_name
+    domain = claimed_domain or "Other"
+    pdf_path = str(report_path(report))
+
+    logger.info(f"AI PROCESSING START - Report #{report.id} - Title: {title}")
+    logger.info(f"PDF Path: {pdf_path}")
+    logger.info(f"Student Claimed Domain: {domain}")
+
+    # Extract once up front so both concurrent prompts read the stored text
+    try:
+        full_text = pdf_text.get_text(pdf_path)
+    except pdf_pool.ExtractionTimeout:
+        # Analyze from the title alone rather than fail the job; nothing is stored,
+        # so a later re-analysis gets another chance at the text. The prompts get
+        # no path so they do not wait on the parser again.
+        logger.warning(f"Text extraction timed out for report #{report.id}; analyzing from the title only")
+        full_text = ""
+        pdf_path = None
+
+    ai_summary, domain_confidence = ai_client.run_sync(_summary_and_domain(title, domain, pdf_path))
+    logger.info(f"AI Summary: {ai_summary}")
+    logger.info(f"Domain Confidence: {domain_confidence}")
+
+    # Candidates come from the whole corpus through the LSH index, each with
+    # its exact shingle similarity; Gemini may refine them semantically.
+    signature, candidates = minhash.find_near_duplicates(
+        db, report, "" if full_text == pdf_text.UNEXTRACTABLE else full_text
+    )
+    with provenance.stage(provenance.SIMILARITY) as run:
+        similarity_result = ai.similarity_score(title, candidates, pdf_path=pdf_path)
+        if candidates and (not similarity_result or candidates[0]['similarity'] > similarity_result['max_similarity']):
+            similarity_result = {
+                'max_similarity': round(candidates[0]['similarity'], 2),
+                'similar_to': candidates[0]['id'],
+                'method': 'minhash'
+            }
+            # A failed Gemini comparison stays flagged even though MinHash answered
+            provenance.set_method("minhash", fallback=bool(run and run.fallback))
+    logger.info(f"Similarity Result: {similarity_result}")
+
+    logger.info(f"AI PROCESSING COMPLETE - Report #{report.id}")
+    return AnalysisResult(
+        ai_summary=ai_summary,
+        ai_domain=domain_confidence,
+        ai_similarity_score=similarity_result['max_similarity'] if similarity_result else 0.0,
+        ai_similar_report_id=similarity_result['similar_to'] if similarity_result else None,
+        minhash=minhash.to_bytes(signature) if signature is not None else None,
+    )
+
+
+def apply_result(db: Session, report: Report, result: AnalysisResult) -> Report:
+    """Persist an analysis result and mark the report as analyzed.
+
+    The AI fields, the MinHash buckets and the ``report_ai_runs`` rows are
+    committed together, so a report never holds results without provenance.
+    """
+    buckets = {}
+    if result.minhash is not None:
+        buckets[report.id] = minhash.band_buckets(minhash.from_bytes(result.minhash))
+    crud.report.bulk_update_analysis(
+        db, [result_mapping(report.id, result)], buckets, runs=run_mappings(report.id, result)
+    )
+    db.refresh(report)
+    return report
+
+
+def result_mapping(report_id: int, result: AnalysisResult) -> dict:
+    """Column values of an analysis result, for ``crud.report.bulk_update_analysis``."""
+    mapping = {
+        "id": report_id,
+        "ai_summary": result.ai_summary,
+        "ai_domain": result.ai_domain,
+        "ai_similarity_score": result.ai_similarity_score,
+        "ai_similar_report_id": result.ai_similar_report_id,
+        "analysis_status": COMPLETED,
+    }
+    if result.minhash is not None:
+        mapping["minhash"] = result.minhash
+    return mapping
+
+
+def run_mappings(report_id: int, result: AnalysisResult) -> list[dict]:
+    """``report_ai_runs`` rows of an analysis result."""
+    return [run.mapping(report_id) for run in result.runs]
+
+
+def reused_result(report: Report, source: Report, source_runs: dict | None = None) -> AnalysisResult:
+    """AI fields of an identical, already analyzed PDF.
+
+    The same file submitted by another student is a verbatim copy, so its
+    similarity is reported as 1.0 instead of the source's own score.
+    ``source_runs`` (latest run per stage of the source) carries its
+    provenance over.
+    """
+    if source.student_id != report.student_id:
+        similarity, similar_report_id = 1.0, source.id
+    else:
+        similarity, similar_report_id = source.ai_similarity_score or 0.0, source.ai_similar_report_id
+    return AnalysisResult(
+        ai_summary=source.ai_summary,
+        ai_domain=source.ai_domain,
+        ai_similarity_score=similarity,
+        ai_similar_report_id=similar_report_id,
+        minhash=source.minhash,
+        runs=provenance.reused(source_runs or {}),
+    )
+
+
+def find_duplicate(db: Session, report: Report) -> Report | None:
+    """Previously analyzed report backed by the same blob, if any."""
+    if not report.content_hash:
+        return None
+    return crud.report.get_analyzed_by_hash(db, report.content_hash, exclude_id=report.id)
+
+
+def analyze_report(db: Session, report: Report, claimed_domain: str | None = None) -> Report:
+    """Run the full pipeline for a report and store its results.
+
+    Identical PDFs reuse the earlier results and skip the Gemini calls.
+    """
+    source = find_duplicate(db, report)
+    if source is not None:
+        logger.info(f"Report #{report.id} duplicates report #{source.id}; reusing its AI results")
+        source_runs = crud.report_ai_run.get_latest_by_stage(db, source.id)
+        return apply_result(db, report, reused_result(report, source, source_runs))
+    result = run_analysis(db, report, claimed_domain=claimed_domain)
+    return apply_result(db, report, result)
+
+
+def mark_failed(db: Session, report: Report) -> Report:
+    """Flag a report whose analysis exhausted its retries."""
+    report.analysis_status = FAILED
+    db.commit()
+    db.refresh(report)
+    return report
@@ -0,0 +1,174 @@
+"""Local stand-in for Gemini models, selected with ``AI_BACKEND=fake``.
+
+``ai_client`` hands out ``FakeModel`` handles instead of
+``genai.GenerativeModel`` ones, so ``ai`` and ``jury_ai`` run their real
+code paths (cache, rate limiter, breaker, hedging, fallbacks) without a key
+or a network. This is meant for benchmarks and load tests of the upload
+pipeline, never for production.
+
+- Latency is log-normal around ``FAKE_AI_LATENCY_MEDIAN_SECONDS``; lite
+  models are ``FAKE_AI_LITE_LATENCY_FACTOR`` times faster.
+- ``FAKE_AI_RATE_LIMIT_RATE`` of calls raise a rate-limit error (a 429) and
+  ``FAKE_AI_TIMEOUT_RATE`` of calls hang until the request deadline.
+- Responses come from the scripts in ``FAKE_AI_RESPONSES_PATH`` (a JSON list
+  of ``{"match": regex, "response": text}``, first match wins), otherwise
+  from built-in answers in the format each prompt asks for.
+
+Every draw uses a generator seeded from ``FAKE_AI_SEED``, the model, the
+prompt and how many times that prompt was sent to that model, so a run
+gives the same outcomes whatever order concurrent calls happen in.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import random
+import re
+import threading
+from collections import Counter
+from functools import lru_cache
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from ..core.config import settings
+
+try:
+    from google.api_core import exceptions as google_exceptions  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    google_exceptions = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+STREAM_CHUNK_WORDS = 8
+
+
+if google_exceptions is not None:
+    class RateLimited(google_exceptions.ResourceExhausted):
+        """Injected 429, raised as the SDK's own rate-limit error."""
+else:
+    class RateLimited(Exception):  # type: ignore[no-redef]
+        """Injected 429."""
+
+
+_attempts: Counter = Counter()
+_stats: Counter = Counter()
+_lock = threading.Lock()
+
+
+@lru_cache(maxsize=4)
+def _load_scripts(path: str) -> List[Tuple[re.Pattern, str]]:
+    if not path:
+        return []
+    try:
+        with open(path, encoding="utf-8") as f:
+            entries = json.load(f)
+        return [(re.compile(entry["match"], re.IGNORECASE | re.DOTALL), entry["response"]) for entry in entries]
+    except Exception as e:
+        logger.error(f"Fake AI: cannot load scripted responses from {path}: {e}")
+        return []
+
+
+def _digest(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+def _builtin_response(prompt: str, rng: random.Random) -> str:
+    """An answer in the format the prompt asks for."""
+    if "classify it into these domains" in prompt:
+        claimed = re.search(r"claims it belongs to: (.+)", prompt)
+        domains = re.search(r"into these domains: (.+?)\.\n", prompt)
+        choices = [d.strip() for d in domains.group(1).split(",")] if domains else ["Other"]
+        top = claimed.group(1).strip() if claimed and claimed.group(1).strip() in choices else rng.choice(choices)
+        others = rng.sample([d for d in choices if d != top], k=min(2, len(choices) - 1))
+        return json.dumps({top: 0.7, **{d: share for d, share in zip(others, (0.2, 0.1))}})
+    if "Previous thesis 1:" in prompt:
+        count = len(re.findall(r"^Previous thesis \d+:", prompt, re.MULTILINE))
+        return json.dumps({str(n): round(rng.uniform(0.0, 0.6), 2) for n in range(1, count + 1)})
+    if "Available Professors:" in prompt:
+        wanted = re.search(r"Recommend the best (\d+) professors", prompt)
+        professors = re.findall(r"^- ID (\d+): (.+?) \(Specialty", prompt, re.MULTILINE)
+        picked = professors[: int(wanted.group(1)) if wanted else 3]
+        return json.dumps([
+            {"professor_id": int(pid), "name": name, "reason": "Specialty matches the thesis domain"}
+            for pid, name in picked
+        ])
+    words = re.findall(r"[A-Za-z]{5,}", prompt)
+    topic = ", ".join(sorted(set(rng.sample(words, k=min(3, len(words)))))) or "its subject"
+    return (
+        f"This thesis addresses {topic}. It describes the approach taken and the system built. "
+        f"It closes with an evaluation of the results (fake response {_digest(prompt)[:8]})."
+    )
+
+
+def respond(prompt: str, rng: random.Random) -> str:
+    for pattern, response in _load_scripts(settings.FAKE_AI_RESPONSES_PATH):
+        if pattern.search(prompt):
+            return response
+    return _builtin_response(prompt, rng)
+
+
+def stats() -> Dict[str, int]:
+    """Calls served by fake models in this process, and how many had an injected failure."""
+    with _lock:
+        return dict(_stats)
+
+
+class _Response:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeModel:
+    """Implements the part of ``genai.GenerativeModel`` that ``ai_client`` uses."""
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self._latency_factor = settings.FAKE_AI_LITE_LATENCY_FACTOR if "lite" in model_name else 1.0
+
+    def _rng(self, prompt: str) -> random.Random:
+        key = (self.model_name, _digest(prompt))
+        with _lock:
+            _attempts[key] += 1
+            attempt = _attempts[key]
+            _stats["calls"] += 1
+        return random.Random(f"{settings.FAKE_AI_SEED}:{self.model_name}:{key[1]}:{attempt}")
+
+    def _latency(self, rng: random.Random) -> float:
+        median = settings.FAKE_AI_LATENCY_MEDIAN_SECONDS * self._latency_factor
+        return rng.lognormvariate(math.log(max(median, 1e-6)), settings.FAKE_AI_LATENCY_SIGMA)
+
+    async def _answer(self, prompt: str, request_options: Optional[Dict]) -> Tuple[str, random.Random]:
+        rng = self._rng(prompt)
+        latency = self._latency(rng)
+        outcome = rng.random()
+        if outcome < settings.FAKE_AI_RATE_LIMIT_RATE:
+            with _lock:
+                _stats["rate_limited"] += 1
+            await asyncio.sleep(min(latency, 0.05))
+            raise RateLimited(f"429 Resource has been exhausted (fake {self.model_name})")
+        if outcome < settings.FAKE_AI_RATE_LIMIT_RATE + settings.FAKE_AI_TIMEOUT_RATE:
+            with _lock:
+                _stats["timed_out"] += 1
+            # Hang past the deadline, like a stuck request; the caller's wait_for gives up first
+            deadline = (request_options or {}).get("timeout") or settings.GEMINI_TIMEOUT_SECONDS
+            await asyncio.sleep(deadline + 1)
+            raise asyncio.TimeoutError(f"fake {self.model_name} timed out")
+        await asyncio.sleep(latency)
+        return respond(prompt, rng), rng
+
+    async def generate_content_async(self, prompt: str, *, stream: bool = False, request_options: Optional[Dict] = None):
+        text, rng = await self._answer(prompt, request_options)
+        if not stream:
+            return _Response(text)
+        return self._chunks(text, rng)
+
+    async def _chunks(self, text: str, rng: random.Random) -> AsyncIterator[_Response]:
+        words = text.split(" ")
+        for start in range(0, len(words), STREAM_CHUNK_WORDS):
+            if start:
+                await asyncio.sleep(rng.uniform(0.5, 1.5) * settings.FAKE_AI_STREAM_CHUNK_SECONDS)
+            chunk = " ".join(words[start:start + STREAM_CHUNK_WORDS])
+            yield _Response(chunk if start + STREAM_CHUNK_WORDS >= len(words) else chunk + " ")
@@ -1,13 +1,9 @@
 """AI-powered jury recommendation system."""
 
 from typing import List, Dict
-import os
 import logging
 
-try:
-    import google.generativeai as genai
-except ImportError:
-    genai = None
+from . import ai, ai_client, jury_index
 
 logger = logging.getLogger(__name__)
 
@@ -37,15 +33,11 @@ def suggest_jury_members(
     fallback_suggestions = _fallback_jury_matching(thesis_domain, available_professors, num_suggestions)
     
     # Try Gemini AI
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key or not genai:
+    if not ai_client.is_available():
         logger.warning("⚠️ GEMINI UNAVAILABLE - Using keyword-based jury suggestions")
         return fallback_suggestions
     
     try:
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel("gemini-2.0-flash-exp")
-        
         # Parse domain if it's a JSON string
         domain_text = thesis_domain
         if isinstance(thesis_domain, dict):
@@ -70,8 +62,12 @@ Select the {num_suggestions} most suitable professors based on domain expertise
 
 JSON response:"""
         
-        response = model.generate_content(prompt)
-        text = response.text.strip()
+        text = ai_client.generate(
+            prompt, model=ai_client.JURY_MODEL, fallback_model=None, validate=ai.json_answer(list)
+        )
+        if not text:
+            logger.warning("⚠️ GEMINI FAILED - Using keyword-based jury suggestions")
+            return fallback_suggestions
         
         # Extract JSON
         if "```" in text:
@@ -92,28 +88,5 @@ JSON response:"""
 
 
 def _fallback_jury_matching(domain, professors: List[Dict], num: int) -> List[Dict]:
-    """Simple keyword-based matching as fallback."""
-    domain_str = str(domain).lower()
-    
-    scored_profs = []
-    for prof in professors:
-        specialty = prof.get('specialty', '').lower()
-        score = 0
-        
-        # Simple keyword matching
-        keywords = domain_str.split()
-        for keyword in keywords:
-            if keyword in specialty or specialty in keyword:
-                score += 1
-        
-        scored_profs.append({
-            "professor_id": prof['id'],
-            "name": prof['name'],
-            "reason": f"Specialty match: {prof.get('specialty', 'General')}",
-            "score": score
-        })
-    
-    # Sort by score and return top N
-    scored_profs.sort(key=lambda x: x['score'], reverse=True)
-    return [{"professor_id": p["professor_id"], "name": p["name"], "reason": p["reason"]} 
-            for p in scored_profs[:num]]
+    """Specialty matching against the domain distribution, as fallback (see ``jury_index``)."""
+    return jury_index.index.rank(domain, professors, num)
@@ -0,0 +1,196 @@
+"""In-memory index of professor specialties for jury matching.
+
+Each professor's free-text ``specialty`` is mapped once onto the analysis
+domains (``ai.DOMAINS``) through a keyword table and stored as a unit row
+of a NumPy matrix. Scoring every professor against a thesis's domain
+distribution (``Report.ai_domain``) is then one matrix-vector product
+(cosine similarity) instead of substring checks per professor and request.
+
+The index is loaded with a single query that eager-loads ``Professor.user``.
+It is rebuilt after professors or their users change in this process (ORM
+events) and at least every ``JURY_INDEX_MAX_AGE_SECONDS`` to pick up
+changes made by other processes.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from .. import crud
+from ..core.config import settings
+from ..models import Professor, User
+from ..models.user import UserRole
+from .ai import DOMAINS
+
+logger = logging.getLogger(__name__)
+
+# Specialty and domain wording (English and French) -> analysis domain. Keywords
+# match whole words; a trailing "*" marks a stem that also matches longer words.
+DOMAIN_KEYWORDS: Dict[str, Sequence[str]] = {
+    "Web": ["web", "frontend", "front-end", "backend", "back-end", "full stack", "fullstack", "javascript", "internet"],
+    "AI": [
+        "ai", "ia", "artificial intelligence", "intelligence artificielle", "machine learning", "apprentissage",
+        "deep learning", "neural", "nlp", "natural language", "computer vision", "vision",
+    ],
+    "IoT": ["iot", "internet of things", "internet des objets", "embedded", "embarqu*", "sensor*", "capteur*", "robotic*", "robotique"],
+    "Mobile": ["mobile", "android", "ios", "flutter", "kotlin", "swift"],
+    "Security": ["security", "securite", "sécurité", "cyber*", "crypto*", "encrypt*", "chiffrement", "forensic*"],
+    "Data Science": [
+        "data", "donnees", "données", "big data", "statistic*", "statistique*", "analytics", "database*",
+        "business intelligence", "data mining",
+    ],
+}
+MIN_SCORE = 1e-6  # Below this a professor has no matching specialty
+
+
+def _keyword_pattern(keyword: str) -> str:
+    if keyword.endswith("*"):
+        return re.escape(keyword[:-1])
+    return re.escape(keyword) + r"\b"
+
+
+_KEYWORD_RES = {
+    domain: re.compile(r"\b(?:" + "|".join(_keyword_pattern(k) for k in keywords) + r")", re.IGNORECASE)
+    for domain, keywords in DOMAIN_KEYWORDS.items()
+}
+_COLUMN = {domain: i for i, domain in enumerate(DOMAINS)}
+
+
+@lru_cache(maxsize=1024)
+def _text_vector(text: str) -> np.ndarray:
+    """Unit vector over DOMAINS for a specialty or domain name; zeros when nothing matches."""
+    vector = np.zeros(len(DOMAINS), dtype=np.float32)
+    text = (text or "").strip()
+    if text in _COLUMN:
+        vector[_COLUMN[text]] = 1.0
+    else:
+        for domain, pattern in _KEYWORD_RES.items():
+            if pattern.search(text):
+                vector[_COLUMN[domain]] = 1.0
+    norm = np.linalg.norm(vector)
+    if norm:
+        vector /= norm
+    vector.flags.writeable = False  # Shared through the cache
+    return vector
+
+
+def domain_vector(thesis_domain: str | Mapping[str, float] | None) -> np.ndarray:
+    """A thesis's domain distribution (or a plain domain name) as a unit vector over DOMAINS."""
+    if isinstance(thesis_domain, Mapping):
+        vector = np.zeros(len(DOMAINS), dtype=np.float32)
+        for name, confidence in thesis_domain.items():
+            vector += float(confidence) * _text_vector(str(name))
+    else:
+        vector = _text_vector(str(thesis_domain or "")).copy()
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class SpecialtyIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._professors: List[Dict] = []
+        self._row_of: Dict[int, int] = {}
+        self._matrix = np.zeros((0, len(DOMAINS)), dtype=np.float32)
+        self._built_at: Optional[float] = None
+        self._generation = 0  # Bumped by every invalidation
+
+    def __len__(self) -> int:
+        return len(self._professors)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._built_at = None
+
+    def _is_fresh(self) -> bool:
+        return self._built_at is not None and time.monotonic() - self._built_at < settings.JURY_INDEX_MAX_AGE_SECONDS
+
+    def refresh(self, db: Session) -> None:
+        """Rebuild the index if professors changed or it is too old."""
+        if self._is_fresh():
+            return
+        with self._lock:
+            generation = self._generation
+        built_at = time.monotonic()
+        rows = crud.professor.get_all_with_user(db)
+        professors = [
+            {
+                "id": p.user_id,
+                "name": f"{p.user.first_name} {p.user.last_name}" if p.user else f"Professor {p.user_id}",
+                "specialty": p.specialty or "General",
+            }
+            for p in rows
+        ]
+        matrix = np.stack([_text_vector(p["specialty"]) for p in professors]) if professors else \
+            np.zeros((0, len(DOMAINS)), dtype=np.float32)
+        with self._lock:
+            self._professors = professors
+            self._row_of = {p["id"]: i for i, p in enumerate(professors)}
+            self._matrix = matrix
+            # A change committed during the rebuild may be missing: stay stale
+            if self._generation == generation:
+                self._built_at = built_at
+        logger.info(f"Jury index: {len(professors)} professor(s) indexed")
+
+    @property
+    def professors(self) -> List[Dict]:
+        """``{id, name, specialty}`` of every indexed professor, by id."""
+        return self._professors
+
+    def rank(self, thesis_domain: str | Mapping[str, float] | None, professors: Sequence[Dict], num: int) -> List[Dict]:
+        """The ``num`` professors among ``professors`` whose specialties best match the thesis domain.
+
+        Indexed professors use their precomputed rows (the whole matrix when
+        ``professors`` is ``self.professors``); an unknown professor makes
+        the rows be computed from the given specialties. Professors with no
+        matching specialty come last, in the given order.
+        """
+        if not professors or num <= 0:
+            return []
+        with self._lock:
+            indexed, matrix, row_of = self._professors, self._matrix, self._row_of
+        if professors is indexed:
+            block = matrix
+        elif all(p["id"] in row_of for p in professors):
+            block = matrix[[row_of[p["id"]] for p in professors]]
+        else:
+            block = np.stack([_text_vector(p.get("specialty") or "") for p in professors])
+        scores = block @ domain_vector(thesis_domain)
+        order = np.argsort(-scores, kind="stable")[:num]
+        return [
+            {
+                "professor_id": professors[i]["id"],
+                "name": professors[i]["name"],
+                "reason": f"Specialty match: {professors[i].get('specialty', 'General')}"
+                if scores[i] > MIN_SCORE else f"No specialty match ({professors[i].get('specialty', 'General')})",
+            }
+            for i in order
+        ]
+
+
+index = SpecialtyIndex()
+
+
+@event.listens_for(Professor, "after_insert")
+@event.listens_for(Professor, "after_update")
+@event.listens_for(Professor, "after_delete")
+def _professor_changed(mapper, connection, target) -> None:
+    index.invalidate()
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _user_changed(mapper, connection, target) -> None:
+    # Names shown in suggestions come from the user row
+    if target.role == UserRole.professor:
+        index.invalidate()
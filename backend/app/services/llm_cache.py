@@ -0,0 +1,140 @@
+"""Persistent cache of Gemini responses keyed by (backend, model, prompt hash).
+
+Backed by a SQLite file (``settings.LLM_CACHE_PATH``) so the API and the
+analysis workers share entries and counters. Entries expire after
+``LLM_CACHE_TTL_SECONDS`` and the least recently used ones are evicted
+beyond ``LLM_CACHE_MAX_ENTRIES``. Hits also add the latency the original
+call took to ``saved_seconds``, which shows what the cache saves. The
+backend (``AI_BACKEND``) is part of the key, so answers of the fake backend
+are never served as Gemini answers.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_EVICT_EVERY = 50  # Puts between two eviction passes
+
+_local = threading.local()
+_puts = 0
+_puts_lock = threading.Lock()
+
+
+def _connect() -> sqlite3.Connection:
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        path = Path(settings.LLM_CACHE_PATH)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(path), timeout=5.0, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            " key TEXT PRIMARY KEY, model TEXT NOT NULL, response TEXT NOT NULL,"
+            " latency REAL NOT NULL DEFAULT 0, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_accessed_at ON llm_cache (accessed_at)")
+        conn.execute("CREATE TABLE IF NOT EXISTS llm_cache_counters (name TEXT PRIMARY KEY, value REAL NOT NULL)")
+        _local.conn = conn
+    return conn
+
+
+def _key(model: str, prompt: str) -> str:
+    return hashlib.sha256(f"{settings.AI_BACKEND}\0{model}\0{prompt}".encode("utf-8")).hexdigest()
+
+
+def _bump(conn: sqlite3.Connection, name: str, amount: float = 1.0) -> None:
+    conn.execute(
+        "INSERT INTO llm_cache_counters (name, value) VALUES (?, ?)"
+        " ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+        (name, amount),
+    )
+
+
+def get(model: str, prompt: str) -> Optional[str]:
+    """Cached response for this model and prompt, or None on a miss.
+
+    With ``LLM_CACHE_READ`` off every lookup misses while ``put`` still
+    stores, which refreshes the entries (re-analysis).
+    """
+    if not settings.LLM_CACHE_ENABLED or not settings.LLM_CACHE_READ:
+        return None
+    try:
+        conn = _connect()
+        now = time.time()
+        row = conn.execute(
+            "SELECT response, latency, created_at FROM llm_cache WHERE key = ?", (_key(model, prompt),)
+        ).fetchone()
+        if row is None or now - row[2] > settings.LLM_CACHE_TTL_SECONDS:
+            _bump(conn, "misses")
+            return None
+        conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, _key(model, prompt)))
+        _bump(conn, "hits")
+        _bump(conn, "saved_seconds", row[1])
+        return row[0]
+    except sqlite3.Error as e:
+        logger.warning(f"LLM cache read failed: {e}")
+        return None
+
+
+def put(model: str, prompt: str, response: str, latency: float = 0.0) -> None:
+    """Store a response along with the time it took to generate."""
+    global _puts
+    if not settings.LLM_CACHE_ENABLED:
+        return
+    try:
+        conn = _connect()
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO llm_cache (key, model, response, latency, created_at, accessed_at)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (_key(model, prompt), model, response, latency, now, now),
+        )
+        with _puts_lock:
+            _puts += 1
+            evict_now = _puts % _EVICT_EVERY == 0
+        if evict_now:
+            evict()
+    except sqlite3.Error as e:
+        logger.warning(f"LLM cache write failed: {e}")
+
+
+def evict() -> int:
+    """Drop expired entries, then the least recently used beyond the size bound."""
+    conn = _connect()
+    expired = conn.execute(
+        "DELETE FROM llm_cache WHERE created_at < ?", (time.time() - settings.LLM_CACHE_TTL_SECONDS,)
+    ).rowcount
+    overflow = conn.execute(
+        "DELETE FROM llm_cache WHERE key IN ("
+        " SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+        (settings.LLM_CACHE_MAX_ENTRIES,),
+    ).rowcount
+    if expired or overflow:
+        _bump(conn, "evictions", expired + overflow)
+    return expired + overflow
+
+
+def stats() -> Dict[str, float]:
+    """Hit/miss counters and size, shared by every process using the cache."""
+    conn = _connect()
+    counters = dict(conn.execute("SELECT name, value FROM llm_cache_counters").fetchall())
+    hits = counters.get("hits", 0.0)
+    misses = counters.get("misses", 0.0)
+    return {
+        "entries": conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0],
+        "hits": int(hits),
+        "misses": int(misses),
+        "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+        "evictions": int(counters.get("evictions", 0.0)),
+        "saved_seconds": round(counters.get("saved_seconds", 0.0), 2),
+    }
@@ -0,0 +1,125 @@
+"""Corpus-wide near-duplicate detection with MinHash signatures and LSH.
+
+Every analyzed report gets a 128-value MinHash signature over its word
+3-shingles, stored in ``Report.minhash``, and 32 LSH band buckets stored in
+``report_lsh_buckets``. A new upload is compared exactly only with reports
+sharing at least one bucket, which is an indexed lookup instead of a scan
+over the whole corpus. With 32 bands of 4 rows, pairs above ~0.4 Jaccard
+are found with high probability.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import zlib
+from typing import List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from .. import crud
+from ..models import Report
+from . import pdf_text
+
+NUM_PERM = 128
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+MAX_CANDIDATES = 20
+
+_PRIME = np.uint64((1 << 32) + 15)  # Smallest prime above 2**32: a*x + b stays below 2**64
+_MASK = np.uint64(0xFFFFFFFF)
+_BLOCK = 8192
+
+_rng = np.random.RandomState(20240601)  # Fixed seed: signatures must be stable across processes
+_A = _rng.randint(1, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+_B = _rng.randint(0, 1 << 31, size=NUM_PERM, dtype=np.uint64)
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def shingle_hashes(text: str) -> np.ndarray:
+    """Sorted unique 32-bit hashes of the word 3-shingles of a text."""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < SHINGLE_SIZE:
+        return np.empty(0, dtype=np.uint64)
+    hashes = {
+        zlib.crc32(" ".join(words[i:i + SHINGLE_SIZE]).encode("utf-8"))
+        for i in range(len(words) - SHINGLE_SIZE + 1)
+    }
+    return np.fromiter(sorted(hashes), dtype=np.uint64, count=len(hashes))
+
+
+def signature(shingles: np.ndarray) -> Optional[np.ndarray]:
+    """MinHash signature (uint32[NUM_PERM]) of a shingle hash array."""
+    if shingles.size == 0:
+        return None
+    sig = np.full(NUM_PERM, np.iinfo(np.uint64).max, dtype=np.uint64)
+    # Blocks keep the (NUM_PERM x block) intermediate small for long theses
+    for start in range(0, shingles.size, _BLOCK):
+        block = shingles[start:start + _BLOCK]
+        hashed = (_A[:, None] * block[None, :] + _B[:, None]) % _PRIME
+        np.minimum(sig, hashed.min(axis=1), out=sig)
+    return (sig & _MASK).astype(np.uint32)
+
+
+def to_bytes(sig: np.ndarray) -> bytes:
+    return sig.astype("<u4").tobytes()
+
+
+def from_bytes(data: bytes) -> np.ndarray:
+    return np.frombuffer(data, dtype="<u4")
+
+
+def band_buckets(sig: np.ndarray) -> List[Tuple[int, int]]:
+    """(band, bucket) pairs of a signature; buckets are signed 64-bit for BIGINT columns."""
+    buckets = []
+    for band in range(BANDS):
+        rows = sig[band * ROWS:(band + 1) * ROWS].astype("<u4").tobytes()
+        digest = hashlib.blake2b(rows, digest_size=8).digest()
+        buckets.append((band, int.from_bytes(digest, "little", signed=True)))
+    return buckets
+
+
+def estimated_similarity(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+def exact_similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Jaccard similarity of two sorted unique shingle hash arrays."""
+    if a.size == 0 or b.size == 0:
+        return 0.0
+    intersection = np.intersect1d(a, b, assume_unique=True).size
+    return intersection / (a.size + b.size - intersection)
+
+
+def find_near_duplicates(db: Session, report: Report, text: str) -> Tuple[Optional[np.ndarray], List[dict]]:
+    """Signature of ``text`` and the LSH candidates ranked by exact similarity.
+
+    Each candidate is ``{'id': report_id, 'title': ..., 'content': text,
+    'similarity': jaccard}``. Candidates whose text is not in the text store
+    fall back to the similarity estimated from their signature.
+    """
+    shingles = shingle_hashes(text)
+    sig = signature(shingles)
+    if sig is None:
+        return None, []
+
+    candidates = []
+    for other in crud.report.get_lsh_candidates(db, band_buckets(sig), exclude_id=report.id, limit=MAX_CANDIDATES):
+        other_text = pdf_text.load_text(other.content_hash) if other.content_hash else None
+        if other_text:
+            similarity = exact_similarity(shingles, shingle_hashes(other_text))
+        elif other.minhash:
+            similarity = estimated_similarity(sig, from_bytes(other.minhash))
+        else:
+            continue
+        candidates.append({
+            'id': other.id,
+            'title': other.file_name,
+            'content': other_text or other.ai_summary or "",
+            'similarity': similarity,
+        })
+    candidates.sort(key=lambda c: c['similarity'], reverse=True)
+    return sig, candidates
@@ -0,0 +1,140 @@
+"""OCR fallback for scanned PDFs, with local Tesseract.
+
+Used by ``pdf_text.get_text`` only when regular extraction returns (almost)
+no text. Pages are rendered with pypdfium2 and read by Tesseract one page
+per task in a dedicated spawn process pool, so a 30-page scan is OCRed
+``OCR_WORKERS`` pages at a time. At most ``OCR_MAX_PAGES`` pages are read and
+the whole document gets ``OCR_TIMEOUT_SECONDS``; the result goes into the
+extracted-text store like any other extraction, so OCR runs once per file.
+
+pytesseract, pypdfium2 and the ``tesseract`` binary are optional: without
+them ``is_available()`` is False and scans stay unreadable as before.
+"""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import shutil
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from typing import List, Optional
+
+from ..core.config import settings
+
+try:
+    import pytesseract  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    pytesseract = None  # type: ignore
+
+try:
+    import pypdfium2 as pdfium  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    pdfium = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[ProcessPoolExecutor] = None
+_lock = threading.Lock()
+
+
+def is_available() -> bool:
+    return (
+        settings.OCR_ENABLED
+        and pytesseract is not None
+        and pdfium is not None
+        and shutil.which(settings.TESSERACT_CMD) is not None
+    )
+
+
+def _ocr_page(pdf_path: str, index: int, dpi: int, lang: str, tesseract_cmd: str) -> str:
+    """Render one page and OCR it. Runs in a pool process."""
+    pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+    pdf = pdfium.PdfDocument(pdf_path)
+    try:
+        page = pdf[index]
+        try:
+            image = page.render(scale=dpi / 72).to_pil()
+        finally:
+            page.close()
+        return pytesseract.image_to_string(image, lang=lang) or ""
+    finally:
+        pdf.close()
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.OCR_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def _kill_executor(executor: ProcessPoolExecutor) -> None:
+    global _executor
+    with _lock:
+        if _executor is executor:
+            _executor = None
+    for process in list(getattr(executor, "_processes", {}).values()):
+        process.terminate()
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def page_count(pdf_path: str) -> int:
+    pdf = pdfium.PdfDocument(pdf_path)
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+
+def extract_text(pdf_path: str, max_pages: int | None = None, page_break: str = "\f") -> str:
+    """OCR text of the first ``max_pages`` pages, joined with ``page_break``; "" when OCR is unavailable.
+
+    Pages that fail or miss the deadline are left empty; the rest is kept.
+    """
+    if not is_available():
+        return ""
+    max_pages = max_pages or settings.OCR_MAX_PAGES
+    try:
+        pages = min(page_count(pdf_path), max_pages)
+    except Exception as e:
+        logger.warning(f"OCR: cannot open {pdf_path}: {e}")
+        return ""
+
+    start = time.perf_counter()
+    executor = _get_executor()
+    futures = [
+        executor.submit(_ocr_page, pdf_path, index, settings.OCR_DPI, settings.OCR_LANG, settings.TESSERACT_CMD)
+        for index in range(pages)
+    ]
+    done, not_done = wait(futures, timeout=settings.OCR_TIMEOUT_SECONDS)
+    if not_done:
+        logger.warning(f"OCR of {pdf_path} exceeded {settings.OCR_TIMEOUT_SECONDS}s; {len(not_done)} page(s) skipped")
+        _kill_executor(executor)
+
+    texts: List[str] = []
+    for index, future in enumerate(futures):
+        if future not in done:
+            texts.append("")
+            continue
+        try:
+            texts.append(future.result().strip())
+        except Exception as e:
+            logger.warning(f"OCR failed on page {index} of {pdf_path}: {e}")
+            texts.append("")
+    text = page_break.join(texts)
+    logger.info(f"OCR: {len(text)} chars from {pages} page(s) of {pdf_path} in {time.perf_counter() - start:.1f}s")
+    return text if text.strip() else ""
+
+
+def shutdown() -> None:
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,156 @@
+"""Dedicated process pool for CPU-bound PDF text extraction.
+
+pdfplumber/PyPDF2 hold the GIL for the whole parse, and a pathological PDF
+can take minutes. Running them in separate processes keeps the caller
+responsive, lets us enforce a hard per-document timeout (the stuck process
+is killed and the pool rebuilt) and caps the number of pages parsed.
+
+At most ``PDF_EXTRACT_WORKERS`` documents are handed to the pool at once,
+so a job never queues inside it and the timeout only measures parsing.
+Killing a stuck worker takes the whole pool down; the other extractions
+running in it are resubmitted to the new pool instead of failing.
+"""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import threading
+import time
+import weakref
+from concurrent.futures import CancelledError, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional, Tuple
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractionTimeout(Exception):
+    pass
+
+
+MAX_RESUBMITS = 2  # Times an extraction is resubmitted after another job's timeout killed its pool
+
+_executor: Optional[ProcessPoolExecutor] = None
+_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(settings.PDF_EXTRACT_WORKERS)  # One per pool worker
+_killed: "weakref.WeakSet[ProcessPoolExecutor]" = weakref.WeakSet()  # Terminated because a job timed out
+
+_metrics = {
+    "submitted": 0,
+    "completed": 0,
+    "failed": 0,
+    "timeouts": 0,
+    "in_flight": 0,
+    "total_seconds": 0.0,
+    "max_seconds": 0.0,
+}
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            # spawn: forking a process that already runs threads (uvicorn, the
+            # worker's DB pool) is unsafe
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.PDF_EXTRACT_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def _kill_executor(executor: ProcessPoolExecutor, timed_out: bool = False) -> None:
+    """Terminate a pool whose worker is stuck; the next call builds a new one."""
+    global _executor
+    with _lock:
+        if _executor is executor:
+            _executor = None
+        if timed_out:
+            _killed.add(executor)
+    for process in list((getattr(executor, "_processes", None) or {}).values()):
+        process.terminate()
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _record(outcome: str, elapsed: float) -> None:
+    with _lock:
+        _metrics["in_flight"] -= 1
+        _metrics[outcome] += 1
+        _metrics["total_seconds"] += elapsed
+        _metrics["max_seconds"] = max(_metrics["max_seconds"], elapsed)
+
+
+def extract(
+    pdf_path: str,
+    *,
+    max_chars: int | None = None,
+    timeout: float | None = None,
+    max_pages: int | None = None,
+) -> Tuple[str, bool]:
+    """Extract a PDF's text in the pool, raising ExtractionTimeout past the deadline.
+
+    Returns ``(text, complete)`` as ``pdf_text.extract_pdf_prefix`` does.
+    """
+    from .pdf_text import extract_pdf_prefix
+
+    timeout = timeout or settings.PDF_EXTRACT_TIMEOUT_SECONDS
+    max_pages = max_pages or settings.PDF_MAX_PAGES
+    with _lock:
+        _metrics["submitted"] += 1
+        _metrics["in_flight"] += 1
+
+    start = time.perf_counter()
+    try:
+        for attempt in range(MAX_RESUBMITS + 1):
+            # Wait here, outside the pool, so the timeout below starts when parsing does
+            with _slots:
+                executor = _get_executor()
+                try:
+                    future = executor.submit(extract_pdf_prefix, pdf_path, max_chars, max_pages)
+                    result = future.result(timeout=timeout)
+                except FutureTimeoutError:
+                    logger.warning(f"PDF extraction timed out after {timeout}s: {pdf_path}")
+                    _kill_executor(executor, timed_out=True)
+                    raise ExtractionTimeout(f"Extraction of {pdf_path} exceeded {timeout}s")
+                except (RuntimeError, CancelledError) as e:
+                    # BrokenProcessPool, or submitting to a pool that was just shut down
+                    if executor in _killed and attempt < MAX_RESUBMITS:
+                        # Killed along with another document's stuck worker: not this PDF's fault
+                        logger.info(f"Resubmitting {pdf_path} after its pool was restarted")
+                        continue
+                    if isinstance(e, BrokenProcessPool):
+                        _kill_executor(executor)
+                    raise
+            break
+    except ExtractionTimeout:
+        _record("timeouts", time.perf_counter() - start)
+        raise
+    except BaseException:
+        _record("failed", time.perf_counter() - start)
+        raise
+
+    _record("completed", time.perf_counter() - start)
+    return result
+
+
+def metrics() -> Dict[str, float]:
+    """Snapshot of extraction counters, queue depth and latency."""
+    with _lock:
+        snapshot = dict(_metrics)
+    finished = snapshot["completed"] + snapshot["failed"] + snapshot["timeouts"]
+    snapshot["queue_depth"] = max(0, snapshot["in_flight"] - settings.PDF_EXTRACT_WORKERS)
+    snapshot["avg_seconds"] = round(snapshot["total_seconds"] / finished, 3) if finished else 0.0
+    snapshot["total_seconds"] = round(snapshot["total_seconds"], 3)
+    snapshot["max_seconds"] = round(snapshot["max_seconds"], 3)
+    return snapshot
+
+
+def shutdown() -> None:
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
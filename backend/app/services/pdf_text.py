@@ -0,0 +1,262 @@
+"""PDF text extraction and the extracted-text store.
+
+Each PDF is parsed once, in the process pool of ``pdf_pool``: the text is
+saved as ``<sha256>.txt`` under ``settings.TEXTS_DIR`` (next to
+``storage/reports``), keyed by the hash of the file content, and every later
+reader gets the stored copy. Scans with no text layer go through ``ocr``
+once and their OCR text is stored the same way.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import re
+import unicodedata
+from contextlib import ExitStack
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from ..core.config import settings
+from . import ocr, pdf_pool
+
+try:
+    import pdfplumber
+except ImportError:
+    pdfplumber = None
+
+try:
+    import PyPDF2
+except ImportError:
+    PyPDF2 = None
+
+logger = logging.getLogger(__name__)
+
+UNEXTRACTABLE = "[Unable to extract text from PDF]"
+PAGE_BREAK = "\f"  # Between pages in extracted text, as pdftotext does
+
+_HASH_CHUNK = 1024 * 1024
+
+# Page quality check deciding when PyPDF2 output is re-read with pdfplumber
+MIN_PAGE_CHARS = 20
+MIN_ALNUM_SHARE = 0.5  # Of non-space characters
+MAX_GARBLED_SHARE = 0.05  # Replacement, private-use and control characters, "(cid:NN)" glyphs
+MAX_AVG_WORD_CHARS = 20  # Longer "words" mean the extractor dropped the spaces
+_CID_RE = re.compile(r"\(cid:\d+\)")
+
+
+def _pdfplumber_pages(pdf_path: str, start: int, end: int | None) -> Iterator[str]:
+    with pdfplumber.open(pdf_path) as pdf:
+        for page in pdf.pages[start:end]:
+            try:
+                yield page.extract_text() or ""
+            finally:
+                # Drop the page's parsed objects right away to keep memory flat
+                page.close()
+
+
+def _pypdf2_pages(pdf_path: str, start: int, end: int | None) -> Iterator[str]:
+    with open(pdf_path, 'rb') as file:
+        reader = PyPDF2.PdfReader(file)
+        stop = len(reader.pages) if end is None else min(end, len(reader.pages))
+        for index in range(start, stop):
+            yield reader.pages[index].extract_text() or ""
+
+
+def page_issue(text: str) -> Optional[str]:
+    """Why a page's text looks broken ("empty", "sparse", "garbled", "no_spaces"), or None if it looks fine."""
+    stripped = text.strip()
+    if len(stripped) < MIN_PAGE_CHARS:
+        return "empty"
+    visible = [c for c in stripped if not c.isspace()]
+    if sum(c.isalnum() for c in visible) < MIN_ALNUM_SHARE * len(visible):
+        return "sparse"
+    suspicious = stripped.count("\ufffd") + 4 * len(_CID_RE.findall(stripped)) + sum(
+        1 for c in stripped if unicodedata.category(c) in ("Co", "Cc") and c not in "\n\t\f"
+    )
+    if suspicious > MAX_GARBLED_SHARE * len(stripped):
+        return "garbled"
+    words = stripped.split()
+    if len(stripped) / len(words) > MAX_AVG_WORD_CHARS:
+        return "no_spaces"
+    return None
+
+
+def _count(stats: Optional[Dict[str, int]], key: str) -> None:
+    if stats is not None:
+        stats[key] = stats.get(key, 0) + 1
+
+
+def iter_pdf_pages(
+    pdf_path: str, start: int = 0, end: int | None = None, stats: Optional[Dict[str, int]] = None
+) -> Iterator[str]:
+    """Yield the text of pages ``[start, end)`` one at a time.
+
+    PyPDF2 (fast) reads every page; a page whose text fails ``page_issue``
+    is re-read with pdfplumber (accurate, several times slower), which is
+    opened only once the first such page shows up. pdfplumber takes over
+    the remaining pages if PyPDF2 is missing or raises. Consumers that stop
+    iterating early never pay for the remaining pages. ``stats`` counts
+    ``pages`` and ``escalated`` pages.
+    """
+    index = start
+    with ExitStack() as stack:
+        plumber = None
+
+        def plumber_page(number: int) -> str:
+            nonlocal plumber
+            try:
+                if plumber is None:
+                    plumber = stack.enter_context(pdfplumber.open(pdf_path))
+                if number >= len(plumber.pages):
+                    return ""
+                page = plumber.pages[number]
+                try:
+                    return page.extract_text() or ""
+                finally:
+                    page.close()
+            except Exception as e:
+                logger.debug(f"pdfplumber failed on page {number} of {pdf_path}: {e}")
+                return ""
+
+        if PyPDF2 is not None:
+            try:
+                for page_text in _pypdf2_pages(pdf_path, start, end):
+                    issue = page_issue(page_text)
+                    if issue and pdfplumber is not None:
+                        _count(stats, "escalated")
+                        better = plumber_page(index)
+                        if page_issue(better) is None or len(better.strip()) > len(page_text.strip()):
+                            page_text = better
+                    _count(stats, "pages")
+                    yield page_text
+                    index += 1
+                return
+            except Exception as e:
+                logger.debug(f"PyPDF2 failed on {pdf_path} at page {index}: {e}")
+
+    if pdfplumber is None:
+        return
+    try:
+        for page_text in _pdfplumber_pages(pdf_path, index, end):
+            _count(stats, "pages")
+            _count(stats, "escalated")
+            yield page_text
+    except Exception:
+        pass
+
+
+def extract_pdf_prefix(
+    pdf_path: str,
+    max_chars: int | None = None,
+    max_pages: int | None = None,
+    pages: Tuple[int, int] | None = None,
+) -> Tuple[str, bool]:
+    """Collect page text until ``max_chars`` is reached.
+
+    Returns ``(text, complete)`` where ``complete`` is False when the budget
+    stopped extraction before the last page.
+    """
+    start, end = pages if pages else (0, None)
+    if max_pages is not None:
+        end = start + max_pages if end is None else min(end, start + max_pages)
+
+    parts: List[str] = []
+    length = 0
+    for page_text in iter_pdf_pages(pdf_path, start, end):
+        page_text = page_text.strip()
+        if not page_text:
+            continue
+        parts.append(page_text)
+        length += len(page_text) + 1
+        if max_chars is not None and length >= max_chars:
+            return PAGE_BREAK.join(parts), False
+    return PAGE_BREAK.join(parts), True
+
+
+def extract_pdf_text(
+    pdf_path: str,
+    max_pages: int | None = None,
+    max_chars: int | None = None,
+    pages: Tuple[int, int] | None = None,
+) -> str:
+    """Extract text from PDF, optionally only the first ``max_chars`` characters
+    or the pages ``pages=(a, b)``.
+    """
+    text, _ = extract_pdf_prefix(pdf_path, max_chars=max_chars, max_pages=max_pages, pages=pages)
+    if max_chars is not None:
+        text = text[:max_chars]
+    return text or UNEXTRACTABLE
+
+
+@lru_cache(maxsize=256)
+def _cached_file_hash(path: str, mtime_ns: int, size: int) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_sha256(pdf_path: str) -> str:
+    """SHA-256 of a file, memoized on (path, mtime, size)."""
+    st = os.stat(pdf_path)
+    return _cached_file_hash(str(pdf_path), st.st_mtime_ns, st.st_size)
+
+
+def _text_path(content_hash: str, partial: bool = False) -> Path:
+    suffix = ".partial.txt" if partial else ".txt"
+    return Path(settings.TEXTS_DIR) / f"{content_hash}{suffix}"
+
+
+def load_text(content_hash: str, partial: bool = False) -> Optional[str]:
+    """Stored text for a content hash, or None if the PDF was never extracted.
+
+    ``partial=True`` reads the prefix saved by a budget-limited extraction.
+    """
+    path = _text_path(content_hash, partial)
+    try:
+        return path.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return None
+
+
+def save_text(content_hash: str, text: str, partial: bool = False) -> None:
+    """Persist extracted text atomically so concurrent readers never see partial files."""
+    path = _text_path(content_hash, partial)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+    if not partial:
+        _text_path(content_hash, partial=True).unlink(missing_ok=True)
+
+
+def get_text(pdf_path: str, max_chars: int | None = None) -> str:
+    """Text of a PDF, extracted on first access and read from the store afterwards.
+
+    With ``max_chars`` only that many characters are guaranteed: extraction
+    stops once the budget is met and the prefix is stored for later callers.
+    Raises ``pdf_pool.ExtractionTimeout`` when the parser exceeds its deadline.
+    """
+    content_hash = file_sha256(pdf_path)
+    text = load_text(content_hash)
+    if text is None and max_chars is not None:
+        prefix = load_text(content_hash, partial=True)
+        if prefix is not None and len(prefix) >= max_chars:
+            text = prefix
+    if text is None:
+        # A timeout propagates and nothing is stored: the analysis job fails and
+        # is retried by the queue, which parses the document again
+        text, complete = pdf_pool.extract(pdf_path, max_chars=max_chars)
+        if complete and len(text.strip()) < settings.OCR_MIN_TEXT_CHARS and ocr.is_available():
+            # No text layer: most likely a scan
+            text = ocr.extract_text(pdf_path, page_break=PAGE_BREAK) or text
+        # Unreadable PDFs are stored as empty text so they are not parsed again
+        save_text(content_hash, text, partial=not complete)
+        logger.info(f"Extracted {len(text)} chars from {pdf_path} ({content_hash[:12]}, complete={complete})")
+    if max_chars is not None:
+        text = text[:max_chars]
+    return text or UNEXTRACTABLE
@@ -0,0 +1,147 @@
+"""Provenance of AI results: which method, model and prompt produced them.
+
+``analysis.run_analysis`` opens a ``recording()`` and runs each stage
+(summary, domain, similarity) inside ``stage(name)``. Code in ``ai`` marks
+how the stage's answer was produced with ``set_method``, and ``ai_client``
+adds every Gemini call it makes (model, tokens, cache hit) with
+``note_call``. The resulting ``StageRun``s become ``report_ai_runs`` rows.
+
+State lives in context variables, so concurrent stages (``asyncio.gather``)
+and concurrent analyses (threads) keep separate records; ``ai_client.run_sync``
+carries the caller's context over to the background event loop. Outside a
+recording every function here is a no-op.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from types import CodeType
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+CHARS_PER_TOKEN = 4
+
+SUMMARY = "summary"
+DOMAIN = "domain"
+SIMILARITY = "similarity"
+
+
+@dataclass
+class StageRun:
+    stage: str
+    method: str = "none"  # gemini | textrank | local_model | jaccard | minhash | placeholder | reused | none
+    fallback: bool = False  # Produced by a fallback path because the primary engine gave no answer
+    model: Optional[str] = None
+    prompt_version: Optional[str] = None
+    latency_ms: int = 0
+    prompt_tokens: int = 0
+    response_tokens: int = 0
+    calls: int = 0
+    cached_calls: int = 0
+
+    def mapping(self, report_id: int) -> dict:
+        """Column values of a ``ReportAiRun`` row."""
+        return {"report_id": report_id, **asdict(self)}
+
+
+_runs: ContextVar[Optional[Dict[str, StageRun]]] = ContextVar("ai_runs", default=None)
+_stage: ContextVar[Optional[StageRun]] = ContextVar("ai_stage", default=None)
+
+
+def _strings(code: CodeType) -> Iterator[str]:
+    for const in code.co_consts:
+        if isinstance(const, str):
+            yield const
+        elif isinstance(const, CodeType):
+            yield from _strings(const)
+
+
+@lru_cache(maxsize=None)
+def prompt_version(*builders: Callable) -> str:
+    """Short hash of the template text of prompt builder functions.
+
+    Only string constants are hashed, so editing a prompt's wording changes
+    the version while refactoring the code around it does not.
+    """
+    digest = hashlib.sha256()
+    for builder in builders:
+        for text in _strings(builder.__code__):
+            digest.update(text.encode("utf-8"))
+    return digest.hexdigest()[:12]
+
+
+@contextmanager
+def recording() -> Iterator[Dict[str, StageRun]]:
+    """Collect the ``StageRun`` of every stage run inside the block, by stage name."""
+    runs: Dict[str, StageRun] = {}
+    token = _runs.set(runs)
+    try:
+        yield runs
+    finally:
+        _runs.reset(token)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[Optional[StageRun]]:
+    runs = _runs.get()
+    if runs is None:
+        yield None
+        return
+    run = runs[name] = StageRun(stage=name)
+    token = _stage.set(run)
+    start = time.perf_counter()
+    try:
+        yield run
+    finally:
+        run.latency_ms = int((time.perf_counter() - start) * 1000)
+        _stage.reset(token)
+
+
+def set_method(method: str, *, fallback: bool = False, prompt_version: Optional[str] = None) -> None:
+    run = _stage.get()
+    if run is not None:
+        run.method = method
+        run.fallback = fallback
+        run.prompt_version = prompt_version
+
+
+def note_call(
+    model: str, prompt: str, response: Optional[str], usage=None, cached: bool = False, failed: bool = False
+) -> None:
+    """Account for one Gemini call; ``usage`` is the response's ``usage_metadata`` when there is one."""
+    run = _stage.get()
+    if run is None:
+        return
+    if cached:
+        run.cached_calls += 1
+        run.model = run.model or model
+        return
+    run.calls += 1
+    if failed:
+        return
+    if response:
+        run.model = model
+    prompt_tokens = getattr(usage, "prompt_token_count", None)
+    response_tokens = getattr(usage, "candidates_token_count", None)
+    # Without usage metadata (e.g. the fake backend) tokens are estimated from the text
+    run.prompt_tokens += prompt_tokens if prompt_tokens is not None else len(prompt) // CHARS_PER_TOKEN
+    run.response_tokens += response_tokens if response_tokens is not None else len(response or "") // CHARS_PER_TOKEN
+
+
+def reused(source_runs: Dict[str, Any]) -> List[StageRun]:
+    """Runs of a report whose results were copied from an identical one (``source_runs`` by stage)."""
+    runs = []
+    for name in (SUMMARY, DOMAIN, SIMILARITY):
+        source = source_runs.get(name)
+        runs.append(StageRun(
+            stage=name,
+            method="reused",
+            fallback=bool(source and source.fallback),
+            model=source.model if source else None,
+            prompt_version=source.prompt_version if source else None,
+        ))
+    return runs
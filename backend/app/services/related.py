@@ -0,0 +1,221 @@
+"""Offline "related theses" search over a sparse TF-IDF matrix.
+
+Each analyzed report becomes one row of hashed unigram+bigram term
+frequencies built from its stored extracted text and ``ai_summary``. Rows
+are appended incrementally: ``refresh`` reads the completed reports whose
+``updated_at`` passed the previous refresh (less a safety overlap for
+transactions committed late), so reports are picked up whatever order
+their analyses finish in and re-analyzed reports are re-indexed. Deleted
+ones are found by comparing counts, which only costs a scan of ids when
+they differ. Replaced rows are zeroed rather than removed until they make
+up ``COMPACT_DEAD_FRACTION`` of the matrix. The weighted, L2-normalised
+matrix is rebuilt lazily, so a query is a single sparse matrix-vector
+product. No Gemini call is involved.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import threading
+import zlib
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ..models import Report
+from . import pdf_text
+
+logger = logging.getLogger(__name__)
+
+N_FEATURES = 1 << 18
+MAX_TEXT_CHARS = 20000  # The beginning of a thesis carries its topic; the rest only adds noise
+MIN_TOKEN_LENGTH = 3
+WATERMARK_OVERLAP = timedelta(minutes=1)  # Reports updated shortly before a refresh may commit after it
+COMPACT_DEAD_FRACTION = 0.25
+COMPACT_MIN_DEAD_ROWS = 100
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _features(text: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Hashed unigram and bigram counts as (indices, sublinear tf) arrays."""
+    words = [w for w in _WORD_RE.findall(text.lower()) if len(w) >= MIN_TOKEN_LENGTH and not w.isdigit()]
+    terms = Counter(words)
+    terms.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+    counts: Counter = Counter()
+    for term, count in terms.items():
+        counts[zlib.crc32(term.encode("utf-8")) % N_FEATURES] += count
+    if not counts:
+        return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+    indices = np.fromiter(counts.keys(), dtype=np.int32, count=len(counts))
+    values = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+    order = np.argsort(indices)
+    return indices[order], (1.0 + np.log(values[order])).astype(np.float32)
+
+
+def report_text(report: Report) -> str:
+    text = pdf_text.load_text(report.content_hash) if report.content_hash else None
+    return f"{report.ai_summary or ''}\n{(text or '')[:MAX_TEXT_CHARS]}"
+
+
+class RelatedIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._report_ids: List[int] = []  # By row; rows of replaced or dropped reports stay, zeroed
+        self._row_of: dict[int, int] = {}
+        self._fingerprints: Dict[int, Tuple] = {}
+        self._watermark: Optional[datetime] = None
+        self._tf = sp.csr_matrix((0, N_FEATURES), dtype=np.float32)
+        self._pending: List[sp.csr_matrix] = []
+        self._df = np.zeros(N_FEATURES, dtype=np.int32)
+        self._matrix: Optional[sp.csr_matrix] = None
+        self._idf: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    def _row_slice(self, row: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(indices, data) views of a row, in the built matrix or still pending."""
+        if row >= self._tf.shape[0]:
+            pending = self._pending[row - self._tf.shape[0]]
+            return pending.indices, pending.data
+        start, end = self._tf.indptr[row], self._tf.indptr[row + 1]
+        return self._tf.indices[start:end], self._tf.data[start:end]
+
+    def _drop(self, report_id: int) -> None:
+        """Zero a report's row and take it out of the document frequencies. Caller holds the lock."""
+        row = self._row_of.pop(report_id, None)
+        self._fingerprints.pop(report_id, None)
+        if row is None:
+            return
+        indices, data = self._row_slice(row)
+        self._df[indices] -= 1
+        data[:] = 0
+        self._matrix = None
+
+    def add(self, report_id: int, text: str, fingerprint: Optional[Tuple] = None) -> None:
+        """Index a report, replacing its row if it was indexed with another fingerprint."""
+        indices, values = _features(text)
+        row = sp.csr_matrix((values, indices, [0, indices.size]), shape=(1, N_FEATURES), dtype=np.float32)
+        with self._lock:
+            if report_id in self._row_of:
+                if self._fingerprints.get(report_id) == fingerprint:
+                    return
+                self._drop(report_id)
+            self._row_of[report_id] = len(self._report_ids)
+            self._fingerprints[report_id] = fingerprint
+            self._report_ids.append(report_id)
+            self._pending.append(row)
+            self._df[indices] += 1
+            self._matrix = None
+
+    def remove(self, report_id: int) -> None:
+        with self._lock:
+            self._drop(report_id)
+
+    def refresh(self, db: Session, batch_size: int = 500) -> int:
+        """Index completed reports that are new or changed since they were indexed, drop deleted ones.
+
+        Returns how many reports were (re-)indexed.
+        """
+        completed = Report.analysis_status == "completed"
+        now = db.query(func.clock_timestamp()).scalar()
+        query = db.query(Report.id, Report.content_hash, Report.updated_at).filter(completed)
+        if self._watermark is not None:
+            query = query.filter(Report.updated_at >= self._watermark)
+        with self._lock:
+            changed = sorted(
+                (report_id, (content_hash, updated_at)) for report_id, content_hash, updated_at in query
+                if self._fingerprints.get(report_id) != (content_hash, updated_at)
+            )
+        fingerprints = dict(changed)
+        ids = [report_id for report_id, _ in changed]
+        for start in range(0, len(ids), batch_size):
+            for report in db.query(Report).filter(Report.id.in_(ids[start:start + batch_size])):
+                self.add(report.id, report_text(report), fingerprints[report.id])
+        self._watermark = now - WATERMARK_OVERLAP
+
+        gone: List[int] = []
+        if db.query(func.count(Report.id)).filter(completed).scalar() != len(self):
+            current = {report_id for report_id, in db.query(Report.id).filter(completed)}
+            with self._lock:
+                gone = [report_id for report_id in self._row_of if report_id not in current]
+                for report_id in gone:
+                    self._drop(report_id)
+        if changed or gone:
+            logger.info(
+                f"Related-theses index: indexed {len(changed)} new or changed report(s), "
+                f"dropped {len(gone)}, {len(self)} total"
+            )
+        return len(changed)
+
+    def _compact(self) -> None:
+        """Remove the zeroed rows of replaced and dropped reports. Caller holds the lock, nothing is pending."""
+        live = sorted(self._row_of.values())
+        self._tf = self._tf[live]
+        # New objects rather than in-place updates: a query may still hold the old ones
+        self._report_ids = [self._report_ids[row] for row in live]
+        self._row_of = {report_id: row for row, report_id in enumerate(self._report_ids)}
+        logger.info(f"Related-theses index: compacted to {len(live)} rows")
+
+    def _weighted(self) -> Tuple[sp.csr_matrix, List[int], Dict[int, int]]:
+        """TF-IDF matrix with unit rows, rebuilt only after new reports were added,
+        with the report ids and rows it was built with."""
+        with self._lock:
+            if self._matrix is None:
+                if self._pending:
+                    self._tf = sp.vstack([self._tf, *self._pending], format="csr")
+                    self._pending = []
+                dead = len(self._report_ids) - len(self._row_of)
+                if dead >= COMPACT_MIN_DEAD_ROWS and dead > COMPACT_DEAD_FRACTION * len(self._report_ids):
+                    self._compact()
+                n_docs = len(self._row_of)
+                self._idf = (np.log((1.0 + n_docs) / (1.0 + self._df)) + 1.0).astype(np.float32)
+                weighted = self._tf.multiply(self._idf).tocsr()
+                norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+                norms[norms == 0] = 1.0
+                self._matrix = sp.diags(1.0 / norms).dot(weighted).tocsr().astype(np.float32)
+            return self._matrix, self._report_ids, self._row_of
+
+    def _query_vector(self, text: str) -> sp.csr_matrix:
+        indices, values = _features(text)
+        weights = values * self._idf[indices]
+        norm = np.linalg.norm(weights) or 1.0
+        return sp.csr_matrix((weights / norm, indices, [0, indices.size]), shape=(1, N_FEATURES), dtype=np.float32)
+
+    def _top_k(
+        self, matrix: sp.csr_matrix, report_ids: List[int], vector: sp.csr_matrix, k: int, exclude_row: Optional[int]
+    ) -> List[Tuple[int, float]]:
+        # CSR times a dense vector is one pass over the non-zeros of the matrix
+        scores = matrix.dot(vector.toarray().ravel())
+        if exclude_row is not None:
+            scores[exclude_row] = -1.0
+        k = min(k, scores.size)
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(report_ids[i], float(scores[i])) for i in top if scores[i] > 0]
+
+    def similar_to_report(self, report_id: int, k: int = 5) -> List[Tuple[int, float]]:
+        """Top-k (report_id, cosine) pairs most similar to an indexed report."""
+        matrix, report_ids, row_of = self._weighted()
+        row = row_of.get(report_id)
+        if row is None or row >= matrix.shape[0]:
+            # Not indexed, or added since the matrix was built
+            return []
+        return self._top_k(matrix, report_ids, matrix[row], k, exclude_row=row)
+
+    def search(self, text: str, k: int = 5) -> List[Tuple[int, float]]:
+        """Top-k (report_id, cosine) pairs for free text."""
+        matrix, report_ids, _ = self._weighted()
+        return self._top_k(matrix, report_ids, self._query_vector(text), k, exclude_row=None)
+
+
+index = RelatedIndex()
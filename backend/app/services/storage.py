@@ -0,0 +1,107 @@
+"""Content-addressed storage for uploaded reports.
+
+A report is stored once per distinct content, as
+``<REPORTS_DIR>/<h[0:2]>/<h[2:4]>/<sha256>.pdf``. The two fan-out levels keep
+every directory small, and ``Report.file_name`` holds the path relative to
+``REPORTS_DIR`` so existing download code keeps working.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO
+from uuid import uuid4
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from ..core.config import settings
+
+CHUNK_SIZE = 1024 * 1024
+PDF_MAGIC = b"%PDF-"
+
+
+class UploadTooLargeError(Exception):
+    pass
+
+
+class InvalidPDFError(Exception):
+    pass
+
+
+@dataclass
+class StoredBlob:
+    content_hash: str
+    file_name: str  # Relative to REPORTS_DIR
+    size: int
+    already_existed: bool
+
+
+def blob_name(content_hash: str, extension: str = ".pdf") -> str:
+    return f"{content_hash[:2]}/{content_hash[2:4]}/{content_hash}{extension}"
+
+
+def blob_path(file_name: str) -> Path:
+    return Path(settings.REPORTS_DIR) / file_name
+
+
+def _tmp_path() -> Path:
+    tmp_dir = Path(settings.REPORTS_DIR) / "tmp"
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    return tmp_dir / f"upload-{uuid4().hex}.part"
+
+
+def commit_blob(tmp_path: Path, content_hash: str, size: int) -> StoredBlob:
+    """Move a fully written temp file to its content address, deduplicating."""
+    name = blob_name(content_hash)
+    final_path = blob_path(name)
+    if final_path.exists():
+        tmp_path.unlink(missing_ok=True)
+        return StoredBlob(content_hash=content_hash, file_name=name, size=size, already_existed=True)
+    final_path.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(tmp_path, final_path)
+    return StoredBlob(content_hash=content_hash, file_name=name, size=size, already_existed=False)
+
+
+def _write_chunk(out: BinaryIO, digest, chunk: bytes) -> None:
+    digest.update(chunk)
+    out.write(chunk)
+
+
+def _discard(out: BinaryIO, tmp_path: Path) -> None:
+    out.close()
+    tmp_path.unlink(missing_ok=True)
+
+
+async def store_upload(upload: UploadFile, *, max_bytes: int) -> StoredBlob:
+    """Stream an upload into the store in chunks.
+
+    Hashing and disk writes run on the threadpool so the event loop never
+    blocks on I/O. The first chunk must carry the PDF signature, and the
+    upload is aborted as soon as it grows past ``max_bytes``.
+    """
+    tmp_path = await run_in_threadpool(_tmp_path)
+    out = await run_in_threadpool(open, tmp_path, "wb")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        while True:
+            chunk = await upload.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            if size == 0 and PDF_MAGIC not in chunk[:1024]:
+                raise InvalidPDFError("File content is not a PDF document")
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLargeError(f"File exceeds the {max_bytes // (1024 * 1024)}MB upload limit")
+            await run_in_threadpool(_write_chunk, out, digest, chunk)
+        if size == 0:
+            raise InvalidPDFError("Uploaded file is empty")
+    except BaseException:
+        await run_in_threadpool(_discard, out, tmp_path)
+        raise
+    await run_in_threadpool(out.close)
+    return await run_in_threadpool(commit_blob, tmp_path, digest.hexdigest(), size)
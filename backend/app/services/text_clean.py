@@ -0,0 +1,136 @@
+"""Normalization of extracted PDF text before it is put in a prompt.
+
+Raw extraction output carries running headers and footers, page numbers,
+tables of contents, bibliographies and words hyphenated across line breaks.
+They use up the character budgets of the prompts in ``ai`` without telling
+the model anything. ``clean`` removes them and collapses whitespace; the
+estimated tokens saved are logged once per document.
+
+Pages are separated by ``pdf_text.PAGE_BREAK``. Text stored before page
+breaks were recorded is treated as one page: repeated lines are then
+detected over the whole document instead of per page, and only TOC entry
+lines are dropped, never the "page" holding a TOC heading.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import List
+
+from .pdf_text import PAGE_BREAK
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4
+EDGE_LINES = 2  # Lines at the top and bottom of a page checked for headers/footers
+MAX_EDGE_LINE_CHARS = 120
+MIN_REPEATS = 3
+REPEATED_PAGE_SHARE = 0.4  # A header/footer shows up on at least this share of pages
+TOC_PAGE_SHARE = 0.5  # Pages where at least this share of lines are TOC entries are dropped
+
+_PAGE_NUMBER_RE = re.compile(
+    r"^\s*(?:-\s*)?(?:page\s*)?(?:\d{1,4}|[ivxl]{1,6})(?:\s*(?:/|of|sur|de)\s*\d{1,4})?(?:\s*-)?\s*$",
+    re.IGNORECASE,
+)
+_TOC_LEADER_RE = re.compile(r"(?:\.\s?){4,}\s*\d{1,4}\s*$")  # "2.1 Background ........ 14"
+_TOC_ENTRY_RE = re.compile(r"(?:\.\s?){4,}\s*\d{1,4}\s*$|\S\s{2,}\d{1,4}\s*$")
+_TOC_HEADING_RE = re.compile(
+    r"^\s*(?:table\s+(?:of\s+contents|des\s+mati[eè]res)|contents|sommaire|list\s+of\s+(?:figures|tables)|"
+    r"liste\s+des\s+(?:figures|tableaux))\s*$",
+    re.IGNORECASE,
+)
+_REFERENCES_RE = re.compile(
+    r"^\s*(?:\d+(?:\.\d+)*\.?\s*)?(?:references|bibliography|bibliographie|r[ée]f[ée]rences(?:\s+bibliographiques)?|webographie)\s*$",
+    re.IGNORECASE,
+)
+_APPENDIX_RE = re.compile(r"^\s*(?:appendix|appendices|annex(?:es?)?)\b", re.IGNORECASE)
+_HYPHENATION_RE = re.compile(r"([a-zà-ÿ])-\n\s*([a-zà-ÿ])")
+_SPACES_RE = re.compile(r"[ \t\u00a0]+")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+_DIGITS_RE = re.compile(r"\d+")
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN
+
+
+def _edge_key(line: str) -> str:
+    # Running headers often embed the page number: "Chapter 2 - 14"
+    return _DIGITS_RE.sub("#", line.strip().lower())
+
+
+def _split_pages(text: str) -> List[List[str]]:
+    return [page.split("\n") for page in text.split(PAGE_BREAK)]
+
+
+def _repeated_edges(pages: List[List[str]]) -> set:
+    """Digit-normalised lines that recur at the top or bottom of many pages."""
+    counts: Counter = Counter()
+    if len(pages) == 1:
+        # No page boundaries: any short line repeated throughout the text
+        counts.update(_edge_key(line) for line in pages[0] if len(line.strip()) <= MAX_EDGE_LINE_CHARS)
+        threshold = MIN_REPEATS + 2
+    else:
+        for lines in pages:
+            content = [line for line in lines if line.strip()]
+            edges = content[:EDGE_LINES] + content[-EDGE_LINES:]
+            counts.update({_edge_key(line) for line in edges if len(line.strip()) <= MAX_EDGE_LINE_CHARS})
+        threshold = max(MIN_REPEATS, int(len(pages) * REPEATED_PAGE_SHARE))
+    return {key for key, count in counts.items() if count >= threshold and key}
+
+
+def _is_toc_page(lines: List[str]) -> bool:
+    content = [line for line in lines if line.strip()]
+    if not content:
+        return False
+    if any(_TOC_HEADING_RE.match(line) for line in content[:3]):
+        return True
+    entries = sum(1 for line in content if _TOC_ENTRY_RE.search(line))
+    return entries >= MIN_REPEATS and entries / len(content) >= TOC_PAGE_SHARE
+
+
+def _strip_references(lines: List[str]) -> List[str]:
+    """Drop everything from the last reference heading in the second half up to an appendix."""
+    for index in range(len(lines) - 1, len(lines) // 2 - 1, -1):
+        if _REFERENCES_RE.match(lines[index]):
+            tail = lines[index + 1:]
+            for offset, line in enumerate(tail):
+                if _APPENDIX_RE.match(line):
+                    return lines[:index] + tail[offset:]
+            return lines[:index]
+    return lines
+
+
+@lru_cache(maxsize=32)
+def clean(text: str) -> str:
+    """Text without running headers/footers, page numbers, TOC, references and broken hyphenation."""
+    if not text:
+        return text
+    pages = _split_pages(text)
+    repeated = _repeated_edges(pages)
+
+    lines: List[str] = []
+    for page in pages:
+        if len(pages) > 1 and _is_toc_page(page):
+            continue
+        for line in page:
+            if _PAGE_NUMBER_RE.match(line) or _TOC_LEADER_RE.search(line):
+                continue
+            if repeated and len(line.strip()) <= MAX_EDGE_LINE_CHARS and _edge_key(line) in repeated:
+                continue
+            lines.append(line)
+    lines = _strip_references(lines)
+
+    cleaned = "\n".join(_SPACES_RE.sub(" ", line).strip() for line in lines)
+    cleaned = _HYPHENATION_RE.sub(r"\1\2", cleaned)
+    cleaned = _BLANK_LINES_RE.sub("\n\n", cleaned).strip()
+
+    before, after = estimate_tokens(text), estimate_tokens(cleaned)
+    if before:
+        logger.info(
+            f"Text cleaning: ~{before} -> ~{after} tokens ({before - after} saved, {100 * (before - after) / before:.0f}%)"
+        )
+    return cleaned
@@ -0,0 +1,105 @@
+"""In-process extractive summarizer (TextRank over TF-IDF sentence vectors).
+
+Sentences of the extracted text become rows of a dense TF-IDF matrix, their
+cosine similarities form a graph and PageRank (power iteration) ranks them.
+The best sentences are returned in document order. Everything is a few
+small NumPy matrix products, so a thesis is summarized in milliseconds
+without a network call. ``ai.summarize`` uses it as the primary engine or as
+the fallback, depending on ``settings.SUMMARY_ENGINE``.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import List
+
+import numpy as np
+
+MAX_TEXT_CHARS = 20000  # Abstract and introduction carry the summary
+MAX_SENTENCES = 300
+MIN_SENTENCE_WORDS = 8
+MAX_SENTENCE_WORDS = 60
+DAMPING = 0.85
+ITERATIONS = 50
+TOLERANCE = 1e-6
+MAX_REDUNDANCY = 0.7  # Cosine above which a sentence repeats one already picked
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+(?=[A-ZÀ-Ý0-9\"'(])")
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def split_sentences(text: str) -> List[str]:
+    """Candidate sentences: prose of reasonable length, not headings or table rows."""
+    text = re.sub(r"\s+", " ", text[:MAX_TEXT_CHARS])
+    sentences, seen = [], set()
+    for sentence in _SENTENCE_RE.split(text):
+        sentence = sentence.strip()
+        if sentence in seen:
+            continue
+        seen.add(sentence)
+        words = _WORD_RE.findall(sentence)
+        if not MIN_SENTENCE_WORDS <= len(words) <= MAX_SENTENCE_WORDS:
+            continue
+        if sum(w.isalpha() for w in words) < 0.7 * len(words):
+            continue
+        sentences.append(sentence)
+        if len(sentences) >= MAX_SENTENCES:
+            break
+    return sentences
+
+
+def _sentence_vectors(sentences: List[str]) -> np.ndarray:
+    """L2-normalised TF-IDF rows, one per sentence."""
+    vocabulary: dict[str, int] = {}
+    rows, cols = [], []
+    for i, sentence in enumerate(sentences):
+        for word in _WORD_RE.findall(sentence.lower()):
+            if len(word) < 3 or word.isdigit():
+                continue
+            rows.append(i)
+            cols.append(vocabulary.setdefault(word, len(vocabulary)))
+    matrix = np.zeros((len(sentences), max(len(vocabulary), 1)), dtype=np.float32)
+    np.add.at(matrix, (np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64)), 1.0)
+    df = np.count_nonzero(matrix, axis=0)
+    matrix *= np.log((1.0 + len(sentences)) / (1.0 + df)) + 1.0
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def rank(sentences: List[str], vectors: np.ndarray | None = None) -> np.ndarray:
+    """TextRank score of every sentence."""
+    if vectors is None:
+        vectors = _sentence_vectors(sentences)
+    similarity = vectors @ vectors.T
+    np.fill_diagonal(similarity, 0.0)
+    out_weight = similarity.sum(axis=1, keepdims=True)
+    out_weight[out_weight == 0] = 1.0
+    transition = (similarity / out_weight).T  # Column-stochastic
+
+    n = len(sentences)
+    scores = np.full(n, 1.0 / n, dtype=np.float32)
+    for _ in range(ITERATIONS):
+        updated = (1 - DAMPING) / n + DAMPING * transition @ scores
+        if np.abs(updated - scores).sum() < TOLERANCE:
+            return updated
+        scores = updated
+    return scores
+
+
+def summarize(text: str, sentences: int = 3) -> str:
+    """The ``sentences`` highest-ranked sentences in document order, or "" when there is too little prose."""
+    candidates = split_sentences(text)
+    if not candidates:
+        return ""
+    if len(candidates) <= sentences:
+        return " ".join(candidates)
+    vectors = _sentence_vectors(candidates)
+    picked: List[int] = []
+    for i in np.argsort(-rank(candidates, vectors)):
+        if picked and float(np.max(vectors[picked] @ vectors[i])) > MAX_REDUNDANCY:
+            continue
+        picked.append(int(i))
+        if len(picked) == sentences:
+            break
+    return " ".join(candidates[i] for i in sorted(picked))
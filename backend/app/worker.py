@@ -0,0 +1,145 @@
+"""Background worker draining the report analysis queue.
+
+Run from ``backend/`` with::
+
+    python -m app.worker
+
+Jobs are stored in the ``analysis_jobs`` table, so they survive restarts and
+several workers can run side by side. SIGINT/SIGTERM stop the loop once the
+job in progress has finished, which lets deployments drain workers safely.
+"""
+
+import contextlib
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app import crud
+from app.services import ai_client, analysis, ocr, pdf_pool
+
+logger = logging.getLogger("app.worker")
+
+
+class Worker:
+    def __init__(self, poll_interval: float | None = None):
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.poll_interval = poll_interval or settings.ANALYSIS_POLL_INTERVAL_SECONDS
+        self._stopping = False
+
+    def request_stop(self, signum=None, frame=None):
+        if not self._stopping:
+            logger.info(f"Worker {self.worker_id} draining: finishing current job before exit")
+        self._stopping = True
+
+    def run_once(self) -> bool:
+        """Process a single job. Returns False when the queue is empty."""
+        db = SessionLocal()
+        try:
+            job = crud.analysis_job.claim_next(db, worker_id=self.worker_id)
+            if job is None:
+                return False
+
+            report = crud.report.get(db, id=job.report_id)
+            if report is None:
+                crud.analysis_job.complete(db, job)
+                return True
+
+            logger.info(f"Job #{job.id}: analyzing report #{report.id} (attempt {job.attempts}/{job.max_attempts})")
+            try:
+                with self._heartbeat(job.id):
+                    analysis.analyze_report(db, report, claimed_domain=job.claimed_domain)
+            except Exception as e:
+                db.rollback()
+                logger.exception(f"Job #{job.id} failed: {e}")
+                retrying = crud.analysis_job.fail(
+                    db, job, error=str(e), retry_delay_seconds=settings.ANALYSIS_RETRY_DELAY_SECONDS
+                )
+                if not retrying:
+                    analysis.mark_failed(db, report)
+                return True
+
+            crud.analysis_job.complete(db, job)
+            logger.info(f"Job #{job.id} done - extraction metrics: {pdf_pool.metrics()}")
+            logger.info(f"Gemini latency: {ai_client.latency_stats()}")
+            return True
+        finally:
+            db.close()
+
+    @contextlib.contextmanager
+    def _heartbeat(self, job_id: int):
+        """Renew the job's lease from a side thread while the block runs."""
+        stop = threading.Event()
+
+        def beat():
+            while not stop.wait(settings.ANALYSIS_HEARTBEAT_SECONDS):
+                db = SessionLocal()
+                try:
+                    if not crud.analysis_job.heartbeat(db, job_id, worker_id=self.worker_id):
+                        logger.warning(f"Job #{job_id}: lease lost, another worker may run it")
+                except Exception as e:
+                    logger.warning(f"Job #{job_id}: heartbeat failed: {e}")
+                finally:
+                    db.close()
+
+        thread = threading.Thread(target=beat, name=f"job-{job_id}-heartbeat", daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def requeue_stale(self):
+        db = SessionLocal()
+        try:
+            requeued, failed = crud.analysis_job.requeue_stale(db, older_than_seconds=settings.ANALYSIS_STALE_JOB_SECONDS)
+            if requeued:
+                logger.warning(f"Requeued {requeued} stale analysis job(s)")
+            if failed:
+                logger.warning(f"Failed {failed} stale analysis job(s) that had no attempts left")
+        finally:
+            db.close()
+
+    def run(self):
+        signal.signal(signal.SIGINT, self.request_stop)
+        signal.signal(signal.SIGTERM, self.request_stop)
+        logger.info(f"Worker {self.worker_id} started")
+
+        last_stale_check = 0.0
+        while not self._stopping:
+            if time.monotonic() - last_stale_check > settings.ANALYSIS_STALE_JOB_SECONDS / 2:
+                self.requeue_stale()
+                last_stale_check = time.monotonic()
+            try:
+                processed = self.run_once()
+            except Exception as e:
+                # Database unavailable or similar: back off instead of crashing the worker
+                logger.exception(f"Worker loop error: {e}")
+                processed = False
+            if not processed:
+                # Sleep in short steps so a stop request is honoured quickly
+                deadline = time.monotonic() + self.poll_interval
+                while not self._stopping and time.monotonic() < deadline:
+                    time.sleep(0.2)
+
+        pdf_pool.shutdown()
+        ocr.shutdown()
+        logger.info(f"Worker {self.worker_id} stopped - extraction metrics: {pdf_pool.metrics()}")
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    Worker().run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+-- Background AI analysis: reports now carry the state of their analysis job.
+-- New tables (analysis_jobs) are created by Base.metadata.create_all at startup;
+-- columns added to existing tables must be applied manually:
+-- Run: psql -h <host> -U <user> -d <db> -f migrations/001_report_analysis_status.sql
+
+BEGIN;
+
+ALTER TABLE reports ADD COLUMN IF NOT EXISTS analysis_status VARCHAR(30);
+
+-- Reports uploaded before the queue existed were analyzed inline.
+UPDATE reports SET analysis_status = 'completed' WHERE analysis_status IS NULL;
+
+COMMIT;
@@ -0,0 +1,11 @@
+-- Content-addressed report storage: reports reference their blob by SHA-256.
+-- Run: psql -h <host> -U <user> -d <db> -f migrations/002_report_content_hash.sql
+-- Existing rows keep a NULL hash and their flat file name; they are simply
+-- never matched for deduplication.
+
+BEGIN;
+
+ALTER TABLE reports ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64);
+CREATE INDEX IF NOT EXISTS ix_reports_content_hash ON reports (content_hash);
+
+COMMIT;
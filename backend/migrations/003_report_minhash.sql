@@ -0,0 +1,11 @@
+-- Corpus-wide near-duplicate detection (services/minhash.py).
+-- report_lsh_buckets is created by Base.metadata.create_all at startup.
+-- Run: psql -h <host> -U <user> -d <db> -f migrations/003_report_minhash.sql
+
+BEGIN;
+
+ALTER TABLE reports ADD COLUMN IF NOT EXISTS minhash BYTEA;
+ALTER TABLE reports ADD COLUMN IF NOT EXISTS ai_similar_report_id INTEGER
+    REFERENCES reports (id) ON DELETE SET NULL ON UPDATE CASCADE;
+
+COMMIT;
@@ -0,0 +1,36 @@
+-- Store reports.ai_domain as JSONB ({"AI": 0.7, "Web": 0.2, ...}) with a GIN index,
+-- so reports can be filtered and aggregated by domain in SQL (see crud_report).
+-- Former values are JSON strings or, for seeded rows, a bare domain name; the
+-- latter become {"<name>": 1.0}. Unparsable JSON (e.g. cut at 150 chars) is cleared.
+-- Run: psql -h <host> -U <user> -d <db> -f migrations/004_report_ai_domain_jsonb.sql
+
+BEGIN;
+
+CREATE FUNCTION pg_temp.ai_domain_jsonb(value TEXT) RETURNS JSONB AS $$
+BEGIN
+    IF value IS NULL OR btrim(value) = '' THEN
+        RETURN NULL;
+    END IF;
+    IF btrim(value) LIKE '{%' THEN
+        BEGIN
+            RETURN value::JSONB;
+        EXCEPTION WHEN others THEN
+            RETURN NULL;
+        END;
+    END IF;
+    RETURN jsonb_build_object(btrim(value), 1.0);
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+DO $$
+BEGIN
+    IF (SELECT data_type FROM information_schema.columns
+        WHERE table_name = 'reports' AND column_name = 'ai_domain') <> 'jsonb' THEN
+        ALTER TABLE reports ALTER COLUMN ai_domain TYPE JSONB USING pg_temp.ai_domain_jsonb(ai_domain);
+    END IF;
+END;
+$$;
+
+CREATE INDEX IF NOT EXISTS ix_reports_ai_domain ON reports USING GIN (ai_domain);
+
+COMMIT;
@@ -0,0 +1,13 @@
+-- Analysis jobs: the worker renews heartbeat_at while it runs a job, and
+-- requeue_stale only takes back jobs whose heartbeat has stopped, so a slow
+-- but live analysis is not claimed by a second worker.
+-- Run: psql -h <host> -U <user> -d <db> -f migrations/005_analysis_job_heartbeat.sql
+
+BEGIN;
+
+ALTER TABLE analysis_jobs ADD COLUMN IF NOT EXISTS heartbeat_at TIMESTAMP;
+
+-- Jobs running at upgrade time count from when they were claimed.
+UPDATE analysis_jobs SET heartbeat_at = locked_at WHERE status = 'running' AND heartbeat_at IS NULL;
+
+COMMIT;
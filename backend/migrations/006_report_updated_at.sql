@@ -0,0 +1,12 @@
+-- Reports: updated_at is set on every update, so the related-theses index
+-- (services/related.py) picks up new and re-analyzed reports from a watermark
+-- instead of scanning the whole table.
+-- Run: psql -h <host> -U <user> -d <db> -f migrations/006_report_updated_at.sql
+
+BEGIN;
+
+ALTER TABLE reports ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT now();
+
+CREATE INDEX IF NOT EXISTS ix_reports_updated_at ON reports (updated_at);
+
+COMMIT;
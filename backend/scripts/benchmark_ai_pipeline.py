@@ -0,0 +1,91 @@
+"""
+Benchmark the AI part of the upload pipeline (summary + domain) offline
+Runs the real ai.summarize / ai.classify_domain code over a corpus of PDFs with the fake Gemini backend
+(services/fake_genai.py), so retries, caching, rate limiting, the breaker and hedging can be load-tested
+without a key. Latency and failure injection come from the FAKE_AI_* settings and the options below.
+Run from backend/: python scripts/benchmark_ai_pipeline.py [corpus_dir] [--requests 50] [--concurrency 8]
+    [--rate-limit-rate 0.1] [--timeout-rate 0.02] [--latency 1.5] [--seed 0] [--cache]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.services import ai, ai_client, fake_genai, llm_cache
+
+
+def analyze(title, pdf_path, claimed):
+    """Summary and domain of one document; returns the seconds it took."""
+    start = time.perf_counter()
+    ai.summarize(title, pdf_path)
+    ai.classify_domain(title, claimed, pdf_path)
+    return time.perf_counter() - start
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", nargs="?", default=settings.REPORTS_DIR, help="Directory searched recursively for PDFs")
+    parser.add_argument("--requests", type=int, default=50, help="Documents analyzed (the corpus is cycled)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Documents analyzed at the same time")
+    parser.add_argument("--rate-limit-rate", type=float, default=settings.FAKE_AI_RATE_LIMIT_RATE)
+    parser.add_argument("--timeout-rate", type=float, default=settings.FAKE_AI_TIMEOUT_RATE)
+    parser.add_argument("--latency", type=float, default=settings.FAKE_AI_LATENCY_MEDIAN_SECONDS, help="Median fake latency (s)")
+    parser.add_argument("--seed", type=int, default=settings.FAKE_AI_SEED)
+    parser.add_argument("--cache", action="store_true", help="Keep the LLM response cache on (off by default)")
+    args = parser.parse_args()
+
+    settings.AI_BACKEND = "fake"
+    settings.FAKE_AI_RATE_LIMIT_RATE = args.rate_limit_rate
+    settings.FAKE_AI_TIMEOUT_RATE = args.timeout_rate
+    settings.FAKE_AI_LATENCY_MEDIAN_SECONDS = args.latency
+    settings.FAKE_AI_SEED = args.seed
+    settings.LLM_CACHE_ENABLED = args.cache
+
+    pdfs = sorted(Path(args.corpus).rglob("*.pdf"))
+    if not pdfs:
+        print(f"No PDFs found under {args.corpus}")
+        return
+    claimed = ai.DOMAINS[:-1]
+    jobs = [
+        (pdfs[i % len(pdfs)].stem, str(pdfs[i % len(pdfs)]), claimed[i % len(claimed)])
+        for i in range(args.requests)
+    ]
+    print(
+        f"Analyzing {len(jobs)} documents ({len(pdfs)} distinct) with {args.concurrency} workers: "
+        f"fake latency {args.latency}s, {args.rate_limit_rate:.0%} 429s, {args.timeout_rate:.0%} timeouts, "
+        f"{settings.GEMINI_REQUESTS_PER_MINUTE:g} requests/min per model"
+    )
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        latencies = list(pool.map(lambda job: analyze(*job), jobs))
+    elapsed = time.perf_counter() - start
+
+    print()
+    print(f"Throughput: {len(jobs) / elapsed:.2f} documents/s ({elapsed:.1f}s total)")
+    print(
+        f"Per document: mean {statistics.mean(latencies):.2f}s, p50 {percentile(latencies, 0.5):.2f}s, "
+        f"p90 {percentile(latencies, 0.9):.2f}s, p99 {percentile(latencies, 0.99):.2f}s"
+    )
+    print(f"Fake backend: {fake_genai.stats()}")
+    print(f"Gemini client latency: {ai_client.latency_stats()}")
+    print(f"Circuit breaker: {ai_client.breaker.state}")
+    if args.cache:
+        print(f"LLM cache: {llm_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark PDF text extraction over a corpus of PDFs
+Compares PyPDF2 alone, pdfplumber alone and the adaptive extractor used by the app
+(PyPDF2 first, pdfplumber only for pages failing the quality check), and reports
+throughput per extractor and how often the adaptive one escalates.
+Run from backend/: python scripts/benchmark_extraction.py [corpus_dir] [--limit 50] [--max-pages 300]
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.services import pdf_text
+
+
+def run(extractor, pdf_path, max_pages):
+    """Extract every page; returns (seconds, pages, chars) or None when the extractor fails."""
+    start = time.perf_counter()
+    pages = chars = 0
+    try:
+        for page in extractor(str(pdf_path), 0, max_pages):
+            pages += 1
+            chars += len(page)
+    except Exception as e:
+        print(f"  ! {pdf_path.name}: {type(e).__name__}: {e}")
+        return None
+    return time.perf_counter() - start, pages, chars
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", nargs="?", default=settings.REPORTS_DIR, help="Directory searched recursively for PDFs")
+    parser.add_argument("--limit", type=int, default=None, help="Benchmark at most this many PDFs")
+    parser.add_argument("--max-pages", type=int, default=settings.PDF_MAX_PAGES)
+    args = parser.parse_args()
+
+    pdfs = sorted(Path(args.corpus).rglob("*.pdf"))[:args.limit]
+    if not pdfs:
+        print(f"No PDFs found under {args.corpus}")
+        return
+
+    extractors = {}
+    if pdf_text.PyPDF2 is not None:
+        extractors["pypdf2"] = pdf_text._pypdf2_pages
+    if pdf_text.pdfplumber is not None:
+        extractors["pdfplumber"] = pdf_text._pdfplumber_pages
+
+    totals = {name: Counter() for name in [*extractors, "adaptive"]}
+    escalated_docs = 0
+    issues = Counter()
+    size = sum(p.stat().st_size for p in pdfs)
+    print(f"Benchmarking {len(pdfs)} PDFs ({size / 1e6:.1f} MB) from {args.corpus}")
+
+    for pdf_path in pdfs:
+        for name, extractor in extractors.items():
+            result = run(extractor, pdf_path, args.max_pages)
+            if result is None:
+                totals[name]["failures"] += 1
+                continue
+            seconds, pages, chars = result
+            totals[name].update({"seconds": seconds, "pages": pages, "chars": chars, "docs": 1})
+
+        stats = {}
+        result = run(lambda path, start, end: pdf_text.iter_pdf_pages(path, start, end, stats=stats), pdf_path, args.max_pages)
+        if result is None:
+            totals["adaptive"]["failures"] += 1
+            continue
+        seconds, pages, chars = result
+        totals["adaptive"].update({"seconds": seconds, "pages": pages, "chars": chars, "docs": 1})
+        totals["adaptive"]["escalated"] += stats.get("escalated", 0)
+        if stats.get("escalated"):
+            escalated_docs += 1
+            for page in pdf_text._pypdf2_pages(str(pdf_path), 0, args.max_pages) if pdf_text.PyPDF2 else []:
+                issue = pdf_text.page_issue(page)
+                if issue:
+                    issues[issue] += 1
+
+    print()
+    print(f"{'extractor':<12}{'docs':>6}{'pages':>8}{'seconds':>10}{'pages/s':>10}{'MB/s':>8}{'chars':>12}{'failed':>8}")
+    for name, total in totals.items():
+        seconds = total["seconds"] or 1e-9
+        print(
+            f"{name:<12}{total['docs']:>6}{total['pages']:>8}{total['seconds']:>10.2f}"
+            f"{total['pages'] / seconds:>10.1f}{size / 1e6 / seconds:>8.2f}{total['chars']:>12}{total['failures']:>8}"
+        )
+
+    adaptive = totals["adaptive"]
+    if adaptive["pages"]:
+        print()
+        print(
+            f"Escalation rate: {adaptive['escalated'] / adaptive['pages']:.1%} of pages, "
+            f"{escalated_docs / max(adaptive['docs'], 1):.1%} of documents"
+        )
+        if issues:
+            print("Escalation reasons: " + ", ".join(f"{issue} {count}" for issue, count in issues.most_common()))
+
+
+if __name__ == "__main__":
+    main()
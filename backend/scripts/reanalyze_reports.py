@@ -0,0 +1,235 @@
+"""
+Re-run the AI analysis of stored reports after a prompt or model change
+Reports are streamed by id with a server-side cursor, analyzed by a bounded pool of threads and
+written back in batches. Progress is checkpointed so an interrupted run resumes where it stopped.
+--target uses the report_ai_runs provenance to pick reports: "stale" (outdated prompt or model, or
+analyzed before provenance was recorded), "fallback" (a field holds a fallback result) or both.
+--refresh-cache ignores cached Gemini answers (they would give the same results back) and stores the new ones.
+Run from backend/: python scripts/reanalyze_reports.py [--target stale,fallback] [--workers 4] [--batch-size 25]
+    [--refresh-cache] [--restart]
+"""
+
+import argparse
+import json
+import logging
+import os
+import signal
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+# Add parent directory to path to import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+from sqlalchemy import or_
+
+load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env'))
+
+from app import crud
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.report import Report
+from app.services import ai, ai_client, analysis, minhash, ocr, pdf_pool
+
+logger = logging.getLogger("reanalyze")
+
+DEFAULT_CHECKPOINT = "storage/reanalyze_checkpoint.json"
+
+
+class Checkpoint:
+    """Highest report id below which every report has been written, plus the ids that failed."""
+
+    def __init__(self, path):
+        self.path = path
+        self.last_id = 0
+        self.failed = []
+        self.processed = 0
+
+    def load(self):
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                data = json.load(f)
+            self.last_id = data.get("last_id", 0)
+            self.failed = data.get("failed", [])
+            self.processed = data.get("processed", 0)
+        return self
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"last_id": self.last_id, "failed": self.failed, "processed": self.processed}, f)
+        os.replace(tmp, self.path)  # Atomic: a crash never leaves a truncated checkpoint
+
+
+TARGETS = ("all", "stale", "fallback")
+
+
+def target_filter(targets):
+    """Filter on Report.id for the requested targets, or None for every report."""
+    selects = []
+    if "stale" in targets:
+        models = [ai_client.PRIMARY_MODEL, ai_client.LITE_MODEL]
+        selects.append(crud.report_ai_run.stale_report_ids(ai.prompt_versions(), models))
+    if "fallback" in targets:
+        selects.append(crud.report_ai_run.fallback_report_ids())
+    if "all" in targets or not selects:
+        return None
+    return or_(*[Report.id.in_(select) for select in selects])
+
+
+def report_ids(after_id, status, batch_size, targets=("all",)):
+    """Stream report ids above ``after_id`` in ascending order."""
+    db = SessionLocal()
+    try:
+        query = db.query(Report.id).filter(Report.id > after_id)
+        if status:
+            query = query.filter(Report.analysis_status == status)
+        condition = target_filter(targets)
+        if condition is not None:
+            query = query.filter(condition)
+        # yield_per turns on stream_results: rows come from a server-side cursor
+        for (report_id,) in query.order_by(Report.id).yield_per(batch_size):
+            yield report_id
+    finally:
+        db.close()
+
+
+def analyze(report_id):
+    """Analyze one report in its own session. Returns (id, result) or (id, None) when it is gone."""
+    db = SessionLocal()
+    try:
+        report = crud.report.get(db, id=report_id)
+        if report is None:
+            return report_id, None
+        job = crud.analysis_job.get_latest_for_report(db, report_id)
+        return report_id, analysis.run_analysis(db, report, claimed_domain=job.claimed_domain if job else None)
+    finally:
+        db.close()
+
+
+def flush(results):
+    """Write a batch of (id, AnalysisResult) in one transaction."""
+    updates, buckets, runs = [], {}, []
+    for report_id, result in results:
+        updates.append(analysis.result_mapping(report_id, result))
+        runs.extend(analysis.run_mappings(report_id, result))
+        if result.minhash is not None:
+            buckets[report_id] = minhash.band_buckets(minhash.from_bytes(result.minhash))
+    db = SessionLocal()
+    try:
+        crud.report.bulk_update_analysis(db, updates, buckets, runs)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4, help="Reports analyzed concurrently")
+    parser.add_argument("--batch-size", type=int, default=25, help="Results written per transaction")
+    parser.add_argument("--status", default="completed", help="Only reports with this analysis_status ('' for all)")
+    parser.add_argument(
+        "--target", default="all",
+        help=f"Comma-separated subset of {', '.join(TARGETS)}: which reports to re-analyze",
+    )
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT)
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start from the first report")
+    parser.add_argument("--limit", type=int, default=None, help="Stop after this many reports")
+    parser.add_argument(
+        "--refresh-cache", action="store_true", help="Call Gemini instead of reusing cached answers, and cache the new ones"
+    )
+    args = parser.parse_args()
+    targets = [target.strip() for target in args.target.split(",") if target.strip()]
+    unknown = set(targets) - set(TARGETS)
+    if unknown:
+        parser.error(f"unknown --target {', '.join(sorted(unknown))}")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if args.refresh_cache:
+        settings.LLM_CACHE_READ = False
+    checkpoint = Checkpoint(args.checkpoint)
+    if not args.restart:
+        checkpoint.load()
+        if checkpoint.last_id:
+            logger.info(f"Resuming after report #{checkpoint.last_id} ({checkpoint.processed} already processed)")
+
+    stopping = False
+
+    def request_stop(signum, frame):
+        nonlocal stopping
+        logger.info("Stopping: finishing reports in progress and saving the checkpoint")
+        stopping = True
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+
+    # Ids are submitted in ascending order but finish out of order. The
+    # checkpoint only advances past an id once every smaller id is written.
+    in_order = []
+    finished = set()
+    pending: dict[Future, int] = {}
+    buffer = []
+    started = time.monotonic()
+    submitted = 0
+
+    def advance():
+        while in_order and in_order[0] in finished:
+            report_id = in_order.pop(0)
+            finished.discard(report_id)
+            checkpoint.last_id = report_id
+
+    def commit_buffer():
+        if buffer:
+            flush(buffer)
+            checkpoint.processed += len(buffer)
+            written = {report_id for report_id, _ in buffer}
+            finished.update(written)
+            buffer.clear()
+        advance()
+        checkpoint.save()
+        rate = checkpoint.processed / max(time.monotonic() - started, 1e-9)
+        logger.info(f"Checkpoint at report #{checkpoint.last_id}: {checkpoint.processed} written, {rate:.2f} reports/s")
+
+    def collect(done):
+        for future in done:
+            report_id = pending.pop(future)
+            try:
+                _, result = future.result()
+            except Exception as e:
+                logger.error(f"Report #{report_id} failed: {e}")
+                checkpoint.failed.append(report_id)
+                finished.add(report_id)
+                continue
+            if result is None:
+                finished.add(report_id)
+            else:
+                buffer.append((report_id, result))
+        if len(buffer) >= args.batch_size:
+            commit_buffer()
+
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        for report_id in report_ids(checkpoint.last_id, args.status, args.batch_size, targets):
+            if stopping or (args.limit is not None and submitted >= args.limit):
+                break
+            # Bounded in-flight work: at most two reports queued per thread
+            while len(pending) >= args.workers * 2:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            in_order.append(report_id)
+            pending[pool.submit(analyze, report_id)] = report_id
+            submitted += 1
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            collect(done)
+    commit_buffer()
+    pdf_pool.shutdown()
+    ocr.shutdown()
+
+    logger.info(f"Done: {checkpoint.processed} report(s) re-analyzed, {len(checkpoint.failed)} failed")
+    if checkpoint.failed:
+        logger.info(f"Failed report ids: {checkpoint.failed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -160,7 +160,7 @@ def seed_comprehensive_data():
             report = Report(
                 file_name=f"report_{i+1}.pdf",
                 ai_summary=f"AI Summary: {def_data['description']}",
-                ai_domain=def_data['domain'],
+                ai_domain={def_data['domain']: 1.0},
                 ai_similarity_score=0.05 + (i * 0.03),
                 student_id=def_data['student'].id
             )
@@ -0,0 +1,104 @@
+"""
+Train the offline domain classifier (services/domain_model.py)
+Labels are the top domain of every report whose current domain came from Gemini (no fallback,
+so the model never learns from its own or placeholder answers); text is the title plus the
+cleaned PDF text, exactly as ai.classify_domain feeds it at prediction time.
+Run from backend/: python scripts/train_domain_model.py [--holdout 0.2] [--alpha 1.0]
+"""
+
+import argparse
+import os
+import random
+import sys
+
+# Add parent directory to path to import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import crud
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.report import Report
+from app.models.thesis_defense import ThesisDefense
+from app.services import domain_model, pdf_text, provenance, text_clean
+from app.services.ai import DOMAINS, _local_domain_text, _normalize_domain
+
+
+def label_of(scores):
+    """Top domain of a stored ai_domain value (confidence per domain), mapped onto DOMAINS."""
+    if not isinstance(scores, dict) or not scores:
+        return None
+    top = max(scores, key=scores.get)
+    label = top if top in DOMAINS else _normalize_domain(top, fallback="")
+    return label or None
+
+
+def load_examples():
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(Report, ThesisDefense.title)
+            .outerjoin(ThesisDefense, ThesisDefense.report_id == Report.id)
+            .filter(
+                Report.ai_domain.isnot(None),
+                Report.analysis_status == "completed",
+                Report.id.in_(crud.report_ai_run.report_ids_by_method(provenance.DOMAIN, "gemini")),
+            )
+            .yield_per(500)
+        )
+        texts, labels = [], []
+        for report, title in rows:
+            label = label_of(report.ai_domain)
+            if label is None:
+                continue
+            title = title or report.file_name or ""
+            raw = pdf_text.load_text(report.content_hash) if report.content_hash else None
+            # Same text as ai._domain_text: cleaned, first 5000 characters, or the title alone
+            text = text_clean.clean(raw)[:5000] if raw and raw != pdf_text.UNEXTRACTABLE else ""
+            texts.append(_local_domain_text(title, text or title))
+            labels.append(label)
+        return texts, labels
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--alpha", type=float, default=1.0, help="Smoothing parameter")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Fraction held out to report accuracy")
+    parser.add_argument("--output", default=settings.DOMAIN_MODEL_PATH)
+    args = parser.parse_args()
+
+    texts, labels = load_examples()
+    if not texts:
+        print("No analyzed reports with a domain; nothing to train on.")
+        return
+    print(f"Loaded {len(texts)} labelled reports")
+
+    if args.holdout > 0 and len(texts) >= 10:
+        order = list(range(len(texts)))
+        random.Random(0).shuffle(order)
+        cut = int(len(order) * (1 - args.holdout))
+        train, test = order[:cut], order[cut:]
+        model = domain_model.DomainModel.train([texts[i] for i in train], [labels[i] for i in train], alpha=args.alpha)
+        correct = confident = confident_correct = 0
+        for i in test:
+            proba = model.predict_proba(texts[i])
+            best = max(proba, key=proba.get)
+            correct += best == labels[i]
+            if proba[best] >= settings.DOMAIN_MODEL_MIN_CONFIDENCE:
+                confident += 1
+                confident_correct += best == labels[i]
+        print(f"Holdout accuracy: {correct / len(test):.1%} on {len(test)} reports")
+        if confident:
+            print(
+                f"Above {settings.DOMAIN_MODEL_MIN_CONFIDENCE:.0%} confidence: {confident / len(test):.1%} of reports, "
+                f"{confident_correct / confident:.1%} correct"
+            )
+
+    model = domain_model.DomainModel.train(texts, labels, alpha=args.alpha)
+    model.save(args.output)
+    print(f"✓ Saved model with classes {model.classes} to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -25,7 +25,7 @@ ON CONFLICT DO NOTHING;
 -- 4) Reports (file_name must match a file in backend/storage/reports/)
 INSERT INTO reports (id, file_name, ai_summary, ai_domain, ai_similarity_score, student_id)
 VALUES
-  (1, 'sample_report.pdf', 'Résumé IA: Excellent travail.', 'AI', 0.12, 2)
+  (1, 'sample_report.pdf', 'Résumé IA: Excellent travail.', '{"AI": 1.0}', 0.12, 2)
 ON CONFLICT DO NOTHING;
 
 -- 5) Thesis Defenses
@@ -0,0 +1,5 @@
+import os
+
+# Settings require these; the tests below never connect to the database
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/test")
+os.environ.setdefault("SECRET_KEY", "test")
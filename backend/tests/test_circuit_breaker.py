@@ -0,0 +1,124 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.services import ai_client
+from app.services.ai_client import CircuitBreaker
+
+
+def opened_breaker() -> CircuitBreaker:
+    breaker = CircuitBreaker(threshold=1, reset_seconds=0)
+    breaker.record_failure()
+    return breaker
+
+
+def test_single_probe_while_half_open():
+    breaker = opened_breaker()
+    ticket = breaker.admit()
+    assert ticket
+    assert breaker.admit() is None
+    breaker.record_failure()
+    assert breaker.admit()
+
+
+def test_released_probe_without_verdict_frees_the_slot():
+    breaker = opened_breaker()
+    ticket = breaker.admit()
+    breaker.release(ticket)
+    assert breaker.state == "half_open"
+    assert breaker.admit()
+
+
+def test_stale_release_keeps_the_current_probe():
+    breaker = opened_breaker()
+    first = breaker.admit()
+    breaker.record_failure()
+    second = breaker.admit()
+    breaker.release(first)
+    assert breaker.admit() is None
+    breaker.release(second)
+    assert breaker.admit()
+
+
+@pytest.fixture
+def half_open(monkeypatch):
+    monkeypatch.setattr(settings, "AI_BACKEND", "fake")
+    monkeypatch.setattr(settings, "LLM_CACHE_ENABLED", False)
+    breaker = opened_breaker()
+    monkeypatch.setattr(ai_client, "breaker", breaker)
+    return breaker
+
+
+def test_probe_returning_none_does_not_block_the_breaker(half_open, monkeypatch):
+    # E.g. no rate-limiter token within GEMINI_MAX_QUEUE_SECONDS, or an empty answer
+    async def no_answer(*args):
+        return None
+
+    monkeypatch.setattr(ai_client, "_hedged_call", no_answer)
+    assert asyncio.run(ai_client.generate_async("prompt")) is None
+    assert [half_open.admit() is not None for _ in range(3)] == [True, False, False]
+
+
+def test_cancelled_probe_does_not_block_the_breaker(half_open, monkeypatch):
+    async def hang(*args):
+        await asyncio.sleep(3600)
+
+    async def cancel_probe():
+        task = asyncio.ensure_future(ai_client.generate_async("prompt"))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    monkeypatch.setattr(ai_client, "_hedged_call", hang)
+    asyncio.run(cancel_probe())
+    assert half_open.admit() is not None
+
+
+async def collect(stream, limit=None):
+    chunks = []
+    async for chunk in stream:
+        chunks.append(chunk)
+        if limit and len(chunks) >= limit:
+            await stream.aclose()
+            break
+    return chunks
+
+
+def wait_for_probe_slot(breaker, seconds=2.0):
+    # The stream runs on the background loop, so its cleanup lands shortly after the consumer's
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        ticket = breaker.admit()
+        if ticket is not None:
+            return ticket
+        time.sleep(0.01)
+    return None
+
+
+def test_stream_probe_without_response_does_not_block_the_breaker(half_open, monkeypatch):
+    async def no_stream(*args):
+        return None
+
+    monkeypatch.setattr(ai_client, "_open_stream", no_stream)
+    assert asyncio.run(collect(ai_client.generate_stream("prompt"))) == []
+    assert wait_for_probe_slot(half_open) is not None
+
+
+def test_closed_stream_probe_does_not_block_the_breaker(half_open, monkeypatch):
+    class Chunk:
+        def __init__(self, text):
+            self.text = text
+
+    async def endless(*args):
+        async def chunks():
+            while True:
+                yield Chunk("word ")
+                await asyncio.sleep(0.01)
+        return chunks()
+
+    monkeypatch.setattr(ai_client, "_open_stream", endless)
+    assert asyncio.run(collect(ai_client.generate_stream("prompt"), limit=1)) == ["word "]
+    assert wait_for_probe_slot(half_open) is not None
@@ -0,0 +1,29 @@
+import pytest
+
+from app.core.config import settings
+from app.services import domain_model
+
+AI_TEXT = "neural network training deep learning model gradient descent"
+WEB_TEXT = "html css javascript frontend browser server http"
+
+
+@pytest.fixture
+def trained(monkeypatch, tmp_path):
+    model = domain_model.DomainModel.train([AI_TEXT] * 4 + [WEB_TEXT], ["AI"] * 4 + ["Web"])
+    path = tmp_path / "model.npz"
+    model.save(path)
+    monkeypatch.setattr(settings, "DOMAIN_MODEL_PATH", str(path))
+    return model
+
+
+def test_text_without_known_terms_has_no_prediction(trained):
+    # The prior alone would give "AI" 0.8
+    assert domain_model.predict("zzz qqq unrelated words") is None
+
+
+def test_confidence_is_the_raw_posterior(trained):
+    prediction = domain_model.predict(AI_TEXT)
+    assert prediction.known_terms == len(domain_model.features(AI_TEXT)[0])
+    assert max(prediction.domains, key=prediction.domains.get) == "AI"
+    assert prediction.confidence == pytest.approx(domain_model.get_model().predict_proba(AI_TEXT)["AI"])
+    assert sum(prediction.domains.values()) == pytest.approx(1.0, abs=0.01)
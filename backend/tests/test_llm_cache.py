@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.services import ai_client, llm_cache
+
+
+@pytest.fixture
+def cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "AI_BACKEND", "fake")
+    monkeypatch.setattr(settings, "LLM_CACHE_ENABLED", True)
+    monkeypatch.setattr(settings, "LLM_CACHE_PATH", str(tmp_path / "cache.sqlite3"))
+    monkeypatch.setattr(ai_client, "breaker", ai_client.CircuitBreaker(threshold=5, reset_seconds=60))
+    monkeypatch.setattr(llm_cache._local, "conn", None, raising=False)
+
+
+def answering(monkeypatch, text, by=ai_client.PRIMARY_MODEL):
+    async def answer(*args):
+        return text, by
+
+    monkeypatch.setattr(ai_client, "_hedged_call", answer)
+
+
+def is_dict(text):
+    return text.startswith("{")
+
+
+def test_rejected_answer_is_returned_but_not_cached(cache, monkeypatch):
+    answering(monkeypatch, '{"AI": 0.')
+    assert asyncio.run(ai_client.generate_async("prompt", validate=lambda text: text.endswith("}"))) == '{"AI": 0.'
+    assert llm_cache.get(ai_client.PRIMARY_MODEL, "prompt") is None
+
+
+def test_accepted_answer_is_cached(cache, monkeypatch):
+    answering(monkeypatch, '{"AI": 1.0}')
+    asyncio.run(ai_client.generate_async("prompt", validate=is_dict))
+    assert llm_cache.get(ai_client.PRIMARY_MODEL, "prompt") == '{"AI": 1.0}'
+
+
+def test_rejected_cache_entry_is_asked_again(cache, monkeypatch):
+    llm_cache.put(ai_client.PRIMARY_MODEL, "prompt", "not json")
+    answering(monkeypatch, '{"AI": 1.0}')
+    assert asyncio.run(ai_client.generate_async("prompt", validate=is_dict)) == '{"AI": 1.0}'
+
+
+def test_cache_read_off_still_stores(cache, monkeypatch):
+    llm_cache.put(ai_client.PRIMARY_MODEL, "prompt", "old")
+    monkeypatch.setattr(settings, "LLM_CACHE_READ", False)
+    answering(monkeypatch, "new")
+    assert asyncio.run(ai_client.generate_async("prompt")) == "new"
+    monkeypatch.setattr(settings, "LLM_CACHE_READ", True)
+    assert llm_cache.get(ai_client.PRIMARY_MODEL, "prompt") == "new"
+
+
+def test_answer_is_cached_under_the_model_that_gave_it(cache, monkeypatch):
+    answering(monkeypatch, "lite answer", by=ai_client.LITE_MODEL)
+    asyncio.run(ai_client.generate_async("prompt"))
+    assert llm_cache.get(ai_client.PRIMARY_MODEL, "prompt") is None
+    assert llm_cache.get(ai_client.LITE_MODEL, "prompt") == "lite answer"
+    # ...and is still found by the next request for the primary model
+    answering(monkeypatch, "fresh answer")
+    assert asyncio.run(ai_client.generate_async("prompt")) == "lite answer"
@@ -62,10 +62,7 @@ export default function RequestHistory({ requests }: RequestHistoryProps) {
                     <span className="font-medium text-gray-700">Domain Confidence:</span>
                     {(() => {
                       try {
-                        // Parse domain if it's JSON string
-                        const domainData = typeof request.domain === 'string' && request.domain.startsWith('{')
-                          ? JSON.parse(request.domain)
-                          : { [request.domain]: 1.0 }
+                        const domainData = request.domainConfidence ?? { [request.domain]: 1.0 }
 
                         return (
                           <div className="flex flex-wrap gap-2">
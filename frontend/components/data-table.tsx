@@ -83,7 +83,7 @@ export const studentSchema = z.object({
 export const reportSchema = z.object({
   file_name: z.string(),
   ai_summary: z.string().nullable(),
-  ai_domain: z.string().nullable(),
+  ai_domain: z.record(z.string(), z.number()).nullable(),
   ai_similarity_score: z.number().nullable(),
   id: z.number(),
   student_id: z.number(),
@@ -107,7 +107,7 @@ export const studentSchema = z.object({
 export const reportSchema = z.object({
   file_name: z.string(),
   ai_summary: z.string().nullable(),
-  ai_domain: z.string().nullable(),
+  ai_domain: z.record(z.string(), z.number()).nullable(),
   ai_similarity_score: z.number().nullable(),
   id: z.number(),
   student_id: z.number(),
@@ -260,7 +260,12 @@ const columns: ColumnDef<z.infer<typeof schema>>[] = [
               </div>
               <div className="grid grid-cols-2 items-center gap-4">
                 <Label>AI Domain</Label>
-                <span>{defense.report.ai_domain}</span>
+                <span>
+                  {Object.entries(defense.report.ai_domain ?? {})
+                    .sort(([, a], [, b]) => b - a)
+                    .map(([domain, confidence]) => `${domain} ${Math.round(confidence * 100)}%`)
+                    .join(', ')}
+                </span>
               </div>
               <div className="grid grid-cols-2 items-center gap-4">
                 <Label>Similarity Score</Label>
@@ -36,6 +36,15 @@ const toFileUrl = (maybePath?: string | null) => {
   return `${API_BASE_URL}/${reportPath}`
 }
 
+// AI domain classification: confidence per domain, e.g. { AI: 0.7, Web: 0.2 }
+export type DomainConfidence = Record<string, number>
+
+export const topDomain = (confidence?: DomainConfidence | null): string | undefined => {
+  if (!confidence) return undefined
+  const entries = Object.entries(confidence)
+  if (entries.length === 0) return undefined
+  return entries.reduce((best, entry) => (entry[1] > best[1] ? entry : best))[0]
+}
 
 export interface SubmitRequestResponse {
   id: string
@@ -43,6 +52,7 @@ export interface SubmitRequestResponse {
   summary?: string
   similarityScore?: number
   domain?: string
+  domainConfidence?: DomainConfidence
 }
 
 export const submitSoutenanceRequest = async (
@@ -60,7 +70,8 @@ export const submitSoutenanceRequest = async (
       pdfUrl: toFileUrl(response.data.report?.file_name),
       summary: response.data.report?.ai_summary,
       similarityScore: response.data.report?.ai_similarity_score,
-      domain: response.data.report?.ai_domain,
+      domain: topDomain(response.data.report?.ai_domain),
+      domainConfidence: response.data.report?.ai_domain ?? undefined,
     }
   } catch (error: any) {
     if (error.code === 'ECONNREFUSED' || error.message?.includes('Network Error') || !error.response) {
@@ -80,7 +91,8 @@ export const getStudentRequests = async () => {
     return response.data.map((defense: any) => ({
       id: defense.id.toString(),
       title: defense.title,
-      domain: defense.report?.ai_domain || 'Unknown',
+      domain: topDomain(defense.report?.ai_domain) || 'Unknown',
+      domainConfidence: defense.report?.ai_domain ?? undefined,
       status: defense.status,
       pdfUrl: toFileUrl(defense.report?.file_name),
       summary: defense.report?.ai_summary,
@@ -95,6 +107,79 @@ export const getStudentRequests = async () => {
   }
 }
 
+export interface AnalysisStatusResponse {
+  status: 'analyzing' | 'completed' | 'failed'
+  attempts: number
+  lastError?: string | null
+  summary?: string
+  similarityScore?: number
+  domain?: string
+  domainConfidence?: DomainConfidence
+}
+
+// Poll the background AI analysis of a submitted request
+export const getAnalysisStatus = async (defenseId: string): Promise<AnalysisStatusResponse> => {
+  try {
+    const response = await api.get(`/api/v1/students/soutenance-requests/${defenseId}/analysis`)
+    return {
+      status: response.data.status,
+      attempts: response.data.attempts,
+      lastError: response.data.last_error,
+      summary: response.data.report?.ai_summary,
+      similarityScore: response.data.report?.ai_similarity_score,
+      domain: topDomain(response.data.report?.ai_domain),
+      domainConfidence: response.data.report?.ai_domain ?? undefined,
+    }
+  } catch (error: any) {
+    if (error.response) {
+      throw new Error(error.response.data.detail || 'Failed to fetch analysis status')
+    }
+    throw new Error('Network error. Please check your connection.')
+  }
+}
+
+// Stream the report summary (Server-Sent Events) as it is generated.
+// EventSource cannot send the Authorization header, so the stream is read with fetch.
+export const streamSummary = async (
+  defenseId: string,
+  onToken: (token: string) => void,
+  options: { refresh?: boolean; signal?: AbortSignal } = {}
+): Promise<string> => {
+  const query = options.refresh ? '?refresh=true' : ''
+  const token = getToken()
+  const response = await fetch(
+    `${API_BASE_URL}/api/v1/students/soutenance-requests/${defenseId}/summary/stream${query}`,
+    {
+      headers: token ? { Authorization: `Bearer ${token}` } : {},
+      signal: options.signal,
+    }
+  )
+  if (!response.ok || !response.body) {
+    throw new Error('Failed to stream summary')
+  }
+
+  const reader = response.body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ''
+  while (true) {
+    const { value, done } = await reader.read()
+    if (done) break
+    buffer += decoder.decode(value, { stream: true })
+    const events = buffer.split('\n\n')
+    buffer = events.pop() || ''
+    for (const raw of events) {
+      const event = raw.match(/^event: (.*)$/m)?.[1]
+      const data = raw.match(/^data: (.*)$/m)?.[1]
+      if (!event || data === undefined) continue
+      const payload = JSON.parse(data)
+      if (event === 'token') onToken(payload)
+      if (event === 'done') return payload.summary
+      if (event === 'error') throw new Error(payload.detail || 'Summary generation was interrupted')
+    }
+  }
+  throw new Error('Summary stream ended unexpectedly')
+}
+
 export interface StatsData {
   total_thesis_defenses: number;
   total_students: number;
@@ -108,6 +193,11 @@ export interface StatsData {
     month: string;
     count: number;
   }[];
+  reports_by_domain?: {
+    domain: string;
+    count: number;
+    average_confidence: number;
+  }[];
 }
 
 export const getDashboardData = async (): Promise<StatsData> => {
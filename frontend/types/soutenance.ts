@@ -24,6 +24,7 @@ export interface SoutenanceRequest {
   id: string
   title: string
   domain: Domain
+  domainConfidence?: Record<string, number>
   status: SoutenanceStatus
   pdfUrl?: string
   summary?: string